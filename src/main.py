@@ -1,163 +1,437 @@
 import os
 import sys
+import time
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, request, jsonify
+# Cold-start time is measured from here, so it includes importing dependencies
+_import_started_at = time.perf_counter()
+
+from flask import Flask, Response, current_app, send_from_directory, request, jsonify
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from datetime import timedelta
+from datetime import datetime, timedelta
+from werkzeug.utils import import_string
+import click
 
 # Import all models
 from src.models.user import db, User, Department, Employee, Customer
 from src.models.payroll import Payroll, Reward, Order, OrderItem
 from src.models.inventory import Inventory, Invoice, Expense, AuditLog, Notification
 
-# Import routes
-from src.routes.auth import auth_bp
-from src.routes.users import users_bp
-from src.routes.employees import employees_bp
-from src.routes.departments import departments_bp
-from src.routes.customers import customers_bp
-from src.routes.orders import orders_bp
-from src.routes.inventory import inventory_bp
-from src.routes.payroll import payroll_bp
-from src.routes.reports import reports_bp
-from src.routes.dashboard import dashboard_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string-change-in-production')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
-app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
-
-# Database configuration - Railway compatible
-database_url = os.getenv('DATABASE_URL')
-if database_url:
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-else:
-    # Fallback for local development
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{os.getenv('DB_USERNAME', 'root')}:{os.getenv('DB_PASSWORD', 'password')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'mydb')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-}
-
-# Initialize extensions
-db.init_app(app)
-jwt = JWTManager(app)
-CORS(app, origins=["*"], supports_credentials=True)
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(users_bp, url_prefix='/api/users')
-app.register_blueprint(employees_bp, url_prefix='/api/employees')
-app.register_blueprint(departments_bp, url_prefix='/api/departments')
-app.register_blueprint(customers_bp, url_prefix='/api/customers')
-app.register_blueprint(orders_bp, url_prefix='/api/orders')
-app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
-app.register_blueprint(payroll_bp, url_prefix='/api/payroll')
-app.register_blueprint(reports_bp, url_prefix='/api/reports')
-app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
-
-# Create database tables
-with app.app_context():
-    db.create_all()
-    
-    # Create default admin user if not exists
-    admin_user = User.query.filter_by(email='admin@company.com').first()
-    if not admin_user:
-        admin_user = User(
-            email='admin@company.com',
-            role='admin',
-            is_active=True
-        )
-        admin_user.set_password('admin123')
-        db.session.add(admin_user)
-        db.session.flush()  # Flush to get the user ID
-        
-        # Create admin employee record
-        admin_employee = Employee(
-            user_id=admin_user.id,
-            employee_number='EMP001',
-            full_name='System Administrator',
-            job_position='Administrator',
-            employment_status='active',
-            hire_date=datetime.utcnow().date()
+from src.services.sales_rollup import rebuild_sales_rollup, ensure_sales_rollup
+from src.services.stock_reservation import expire_stale_reservations
+from src.services.audit import audit_writer
+from src.services.passwords import get_benchmark_policies, benchmark_policy
+from src.services.token_revocation import token_revocation
+from src.services.db_pool import get_engine_options, pool_metrics
+from src.services.query_stats import query_stats
+from src.services.request_metrics import request_metrics
+from src.services.benchmark import get_dataset_sizes, generate_dataset, run_benchmark, compare_to_baseline, load_baseline, save_baseline
+from src.services.bulk_import import IMPORTERS, BulkImportError, import_records, read_records
+from src.services.inventory_search import inventory_search
+from src.services.inventory_lookup import normalize_barcodes
+from src.services.global_search import global_search
+from src.services.autocomplete import autocomplete
+from src.services.search_keys import ensure_search_key_columns, backfill_search_keys
+
+# Blueprints as (name, import path, URL prefix); route modules are only imported when registered
+BLUEPRINTS = (
+    ('auth', 'src.routes.auth:auth_bp', '/api/auth'),
+    ('users', 'src.routes.users:users_bp', '/api/users'),
+    ('employees', 'src.routes.employees:employees_bp', '/api/employees'),
+    ('departments', 'src.routes.departments:departments_bp', '/api/departments'),
+    ('customers', 'src.routes.customers:customers_bp', '/api/customers'),
+    ('orders', 'src.routes.orders:orders_bp', '/api/orders'),
+    ('inventory', 'src.routes.inventory:inventory_bp', '/api/inventory'),
+    ('payroll', 'src.routes.payroll:payroll_bp', '/api/payroll'),
+    ('reports', 'src.routes.reports:reports_bp', '/api/reports'),
+    ('dashboard', 'src.routes.dashboard:dashboard_bp', '/api/dashboard'),
+    ('metrics', 'src.routes.metrics:metrics_bp', '/api/metrics'),
+    ('search', 'src.routes.search:search_bp', '/api/search'),
+    ('autocomplete', 'src.routes.autocomplete:autocomplete_bp', '/api/autocomplete')
+)
+
+DEFAULT_DEPARTMENTS = [
+    {'name': 'Administration', 'description': 'Administrative department'},
+    {'name': 'Human Resources', 'description': 'HR department'},
+    {'name': 'Sales', 'description': 'Sales department'},
+    {'name': 'Finance', 'description': 'Finance and accounting department'},
+    {'name': 'Logistics', 'description': 'Logistics and shipping department'},
+    {'name': 'Warehouse', 'description': 'Warehouse and inventory management'},
+    {'name': 'Customer Support', 'description': 'Customer support department'},
+    {'name': 'IT', 'description': 'Information Technology department'}
+]
+
+
+def create_app(config=None):
+    """Create the Flask application without touching the database
+
+    Tables and default data are created by `flask init-db`, so gunicorn workers
+    and serverless cold starts never wait on a database round trip. Set
+    APP_BLUEPRINTS to a comma-separated list of blueprint names to load only
+    those route modules.
+    """
+    global _import_started_at
+    started = _import_started_at or time.perf_counter()
+    _import_started_at = None
+
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+
+    # Configuration
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string-change-in-production')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+
+    # Database configuration - Railway compatible
+    database_url = os.getenv('DATABASE_URL')
+    if database_url:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    else:
+        # Fallback for local development
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{os.getenv('DB_USERNAME', 'root')}:{os.getenv('DB_PASSWORD', 'password')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'mydb')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', get_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    # Initialize extensions; creating the engine does not open a connection
+    db.init_app(app)
+    jwt = JWTManager(app)
+    register_jwt_handlers(jwt)
+    pool_metrics.init_app(app, db)
+
+    # Count SQL queries per request unless disabled
+    if os.getenv('QUERY_STATS', '1') != '0':
+        query_stats.init_app(app, db)
+
+    request_metrics.init_app(app)
+    global_search.init_app(app, db)
+    autocomplete.init_app(app, db)
+
+    # Write audit events from a background thread unless disabled (e.g. on serverless hosts)
+    if os.getenv('AUDIT_ASYNC', '1') != '0':
+        audit_writer.init_app(app)
+
+    CORS(app, origins=["*"], supports_credentials=True)
+
+    enabled_blueprints = os.getenv('APP_BLUEPRINTS')
+    register_blueprints(app, enabled_blueprints.split(',') if enabled_blueprints else None)
+    register_error_handlers(app)
+
+    for command in CLI_COMMANDS:
+        app.cli.add_command(command)
+
+    app.add_url_rule('/metrics', view_func=metrics)
+    app.add_url_rule('/api/health', view_func=health_check)
+    app.add_url_rule('/', defaults={'path': ''}, view_func=serve)
+    app.add_url_rule('/<path:path>', view_func=serve)
+
+    app.config['STARTUP_MS'] = round((time.perf_counter() - started) * 1000, 1)
+    app.logger.info('Application created in %.1f ms', app.config['STARTUP_MS'])
+
+    return app
+
+def register_blueprints(app, names=None):
+    """Import and register blueprints, only those listed in names when given"""
+    names = {name.strip() for name in names} if names else None
+    for name, import_path, url_prefix in BLUEPRINTS:
+        if names is None or name in names:
+            app.register_blueprint(import_string(import_path), url_prefix=url_prefix)
+
+def check_unique_barcodes():
+    """Prepare inventory barcodes for their unique index, refusing on duplicates"""
+    duplicates = normalize_barcodes()
+    if duplicates:
+        listed = '; '.join(f'{barcode}: {", ".join(codes)}' for barcode, codes in list(duplicates.items())[:20])
+        raise click.ClickException(
+            f'Barcodes shared by several inventory items ({len(duplicates)}): {listed}. '
+            'Give each item its own barcode or clear the extra ones, then run init-db again.'
         )
-        db.session.add(admin_employee)
-        
-        # Create default departments
-        departments = [
-            {'name': 'Administration', 'description': 'Administrative department'},
-            {'name': 'Human Resources', 'description': 'HR department'},
-            {'name': 'Sales', 'description': 'Sales department'},
-            {'name': 'Finance', 'description': 'Finance and accounting department'},
-            {'name': 'Logistics', 'description': 'Logistics and shipping department'},
-            {'name': 'Warehouse', 'description': 'Warehouse and inventory management'},
-            {'name': 'Customer Support', 'description': 'Customer support department'},
-            {'name': 'IT', 'description': 'Information Technology department'}
-        ]
-        
-        for dept_data in departments:
-            dept = Department(**dept_data)
-            db.session.add(dept)
-        
-        db.session.commit()
-        print("Default admin user and departments created successfully!")
+
+def create_missing_indexes():
+    """Create indexes added to models after their tables were created"""
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def seed_default_data(admin_email='admin@company.com', admin_password='admin123'):
+    """Create the default admin user, its employee record and departments if missing
+
+    Returns True when anything was created.
+    """
+    # Create default admin user if not exists
+    admin_user = User.query.filter_by(email=admin_email).first()
+    if admin_user:
+        return False
+
+    admin_user = User(
+        email=admin_email,
+        role='admin',
+        is_active=True
+    )
+    admin_user.set_password(admin_password)
+    db.session.add(admin_user)
+    db.session.flush()  # Flush to get the user ID
+
+    # Create admin employee record
+    admin_employee = Employee(
+        user_id=admin_user.id,
+        employee_number='EMP001',
+        full_name='System Administrator',
+        position='Administrator',
+        employment_status='active',
+        hire_date=datetime.utcnow().date()
+    )
+    db.session.add(admin_employee)
+
+    # Create default departments
+    existing = {name for (name,) in db.session.query(Department.name)}
+    for dept_data in DEFAULT_DEPARTMENTS:
+        if dept_data['name'] not in existing:
+            db.session.add(Department(**dept_data))
+
+    db.session.commit()
+    return True
 
 # Error handlers
-@app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Not found'}), 404
 
-@app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal server error'}), 500
 
-@app.errorhandler(400)
 def bad_request(error):
     return jsonify({'error': 'Bad request'}), 400
 
-@app.errorhandler(401)
 def unauthorized(error):
     return jsonify({'error': 'Unauthorized'}), 401
 
-@app.errorhandler(403)
 def forbidden(error):
     return jsonify({'error': 'Forbidden'}), 403
 
+def register_error_handlers(app):
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    app.register_error_handler(400, bad_request)
+    app.register_error_handler(401, unauthorized)
+    app.register_error_handler(403, forbidden)
+
 # JWT error handlers
-@jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
     return jsonify({'error': 'Token has expired'}), 401
 
-@jwt.invalid_token_loader
 def invalid_token_callback(error):
     return jsonify({'error': 'Invalid token'}), 401
 
-@jwt.unauthorized_loader
 def missing_token_callback(error):
     return jsonify({'error': 'Authorization token is required'}), 401
 
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return token_revocation.is_revoked(jwt_payload['jti'])
+
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({'error': 'Token has been revoked'}), 401
+
+def register_jwt_handlers(jwt):
+    jwt.expired_token_loader(expired_token_callback)
+    jwt.invalid_token_loader(invalid_token_callback)
+    jwt.unauthorized_loader(missing_token_callback)
+    jwt.token_in_blocklist_loader(check_if_token_revoked)
+    jwt.revoked_token_loader(revoked_token_callback)
+
+# CLI commands
+@click.command('init-db')
+@click.option('--admin-email', default='admin@company.com', help='Email of the default admin user')
+@click.option('--admin-password', default='admin123', help='Password of the default admin user')
+@with_appcontext
+def init_db_command(admin_email, admin_password):
+    """Create missing tables and the default admin user and departments"""
+    started = time.perf_counter()
+    db.create_all()
+    ensure_search_key_columns()
+    check_unique_barcodes()
+    create_missing_indexes()
+    backfill_search_keys()
+    created = seed_default_data(admin_email, admin_password)
+    rollup_rows = ensure_sales_rollup()
+    search_backend = inventory_search.ensure_index()
+    click.echo(f'Database initialized in {time.perf_counter() - started:.1f}s'
+               + ('; default admin user and departments created' if created else '')
+               + (f'; daily sales rollup built: {rollup_rows} rows' if rollup_rows is not None else '')
+               + f'; inventory search uses {search_backend}')
+
+@click.command('rebuild-search-keys')
+@click.option('--chunk-size', default=1000, help='Rows updated per statement')
+@with_appcontext
+def rebuild_search_keys_command(chunk_size):
+    """Recompute normalized search keys, e.g. after the normalization rules change"""
+    ensure_search_key_columns()
+    counts = backfill_search_keys(rebuild=True, chunk_size=chunk_size)
+    click.echo('Search keys rebuilt: ' + ', '.join(f'{table} {rows}' for table, rows in counts.items()))
+
+@click.command('rebuild-sales-rollup')
+@click.option('--start-date', type=click.DateTime(formats=['%Y-%m-%d']), help='First order date to rebuild')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), help='Last order date to rebuild')
+@with_appcontext
+def rebuild_sales_rollup_command(start_date, end_date):
+    """Rebuild the daily sales rollup from the orders table"""
+    rows = rebuild_sales_rollup(
+        start_date.date() if start_date else None,
+        end_date.date() if end_date else None
+    )
+    click.echo(f'Daily sales rollup rebuilt: {rows} rows written')
+
+@click.command('expire-stock-reservations')
+@with_appcontext
+def expire_stock_reservations_command():
+    """Cancel pending orders whose stock reservations have expired"""
+    expired = expire_stale_reservations()
+    click.echo(f'Stock reservations expired: {expired} orders cancelled')
+
+@click.command('replay-audit-spill')
+@with_appcontext
+def replay_audit_spill_command():
+    """Write audit events spilled to disk while the audit queue was full"""
+    replayed = audit_writer.replay_spill()
+    click.echo(f'Audit events replayed: {replayed}')
+
+@click.command('prune-revoked-tokens')
+@with_appcontext
+def prune_revoked_tokens_command():
+    """Delete revocations for tokens that have already expired"""
+    deleted = token_revocation.prune_expired()
+    click.echo(f'Revoked tokens pruned: {deleted} rows deleted')
+
+@click.command('benchmark-password-hash')
+@click.option('--duration', default=1.0, help='Seconds to spend on each setting')
+@with_appcontext
+def benchmark_password_hash_command(duration):
+    """Report password hashes per second for the configured and common settings"""
+    for policy in get_benchmark_policies():
+        rate = benchmark_policy(policy, duration)
+        click.echo(f'{policy.method:<28} {rate:8.1f} hashes/sec  ({1000 / rate:.1f} ms/hash)')
+
+@click.command('seed-benchmark-data')
+@click.option('--scale', default=0.01, help='Fraction of the full dataset (100k customers, 5M orders, 20M items)')
+@click.option('--customers', type=int, help='Customers to generate, overriding --scale')
+@click.option('--products', type=int, help='Products to generate, overriding --scale')
+@click.option('--employees', type=int, help='Employees to generate, overriding --scale')
+@click.option('--orders', type=int, help='Orders to generate, overriding --scale')
+@click.option('--order-items', type=int, help='Order items to generate, overriding --scale')
+@click.option('--seed', default=0, help='Random seed; use a new one to add another dataset')
+@click.option('--chunk-size', default=5000, help='Rows per insert batch')
+@with_appcontext
+def seed_benchmark_data_command(scale, customers, products, employees, orders, order_items, seed, chunk_size):
+    """Load a synthetic dataset for benchmarking"""
+    sizes = get_dataset_sizes(scale, customers=customers, products=products, employees=employees,
+                              orders=orders, order_items=order_items)
+    started = time.perf_counter()
+    counts = generate_dataset(
+        sizes,
+        seed=seed,
+        chunk_size=chunk_size,
+        progress=lambda table, rows: click.echo(f'  {table}: {rows}/{sizes.get(table, rows)}')
+    )
+    click.echo(f'Benchmark data loaded in {time.perf_counter() - started:.1f}s: '
+               + ', '.join(f'{count} {table}' for table, count in counts.items()))
+
+@click.command('import-data')
+@click.argument('table', type=click.Choice(sorted(IMPORTERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension')
+@click.option('--chunk-size', default=5000, help='Records per insert batch and transaction')
+@click.option('--max-errors', default=0, help='Bad records to skip before stopping')
+@with_appcontext
+def import_data_command(table, path, file_format, chunk_size, max_errors):
+    """Bulk-load employees, customers, inventory, orders or order items from CSV/NDJSON"""
+    started = time.perf_counter()
+
+    def progress(counts, skipped):
+        rows = counts.get(table, 0)
+        click.echo(f'  {rows} {table} imported, {skipped} skipped ({rows / (time.perf_counter() - started):.0f} rows/sec)')
+
+    try:
+        counts, skipped, errors = import_records(
+            table, read_records(path, file_format), chunk_size=chunk_size, max_errors=max_errors, progress=progress
+        )
+    except BulkImportError as e:
+        raise click.ClickException(str(e))
+
+    for error in errors:
+        click.echo(f'Skipped {error}')
+    click.echo(f'Import finished in {time.perf_counter() - started:.1f}s: '
+               + ', '.join(f'{count} {name}' for name, count in counts.items())
+               + f', {skipped} records skipped')
+
+@click.command('benchmark-endpoints')
+@click.option('--requests', 'requests_per_endpoint', default=200, help='Measured requests per endpoint')
+@click.option('--concurrency', default=8, help='Concurrent clients')
+@click.option('--base-url', help='Benchmark a running server (e.g. gunicorn) instead of the test client')
+@click.option('--output', help='Write the result to this JSON file, e.g. to record a new baseline')
+@click.option('--baseline', help='Compare against a saved result and exit 1 on regressions')
+@click.option('--tolerance', default=0.2, help='Allowed slowdown over the baseline as a fraction')
+@with_appcontext
+def benchmark_endpoints_command(requests_per_endpoint, concurrency, base_url, output, baseline, tolerance):
+    """Report p50/p95/p99 latency per endpoint and check for regressions"""
+    result = run_benchmark(current_app._get_current_object(), requests_per_endpoint=requests_per_endpoint,
+                           concurrency=concurrency, base_url=base_url)
+
+    click.echo(f'{"endpoint":<30} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>8} {"queries":>8} {"errors":>7}')
+    for name, data in result['endpoints'].items():
+        click.echo(f'{name:<30} {data["p50_ms"]:9.1f} {data["p95_ms"]:9.1f} {data["p99_ms"]:9.1f} '
+                   f'{data["throughput_rps"]:8.1f} {data["avg_queries"] if data["avg_queries"] is not None else "-":>8} {data["errors"]:7}')
+
+    if output:
+        save_baseline(result, output)
+        click.echo(f'Benchmark result written to {output}')
+
+    if baseline:
+        regressions = compare_to_baseline(result, load_baseline(baseline), tolerance)
+        for regression in regressions:
+            click.echo(f'REGRESSION {regression["endpoint"]} {regression["metric"]}: '
+                       f'{regression["baseline"]} -> {regression["current"]}')
+        if regressions:
+            sys.exit(1)
+        click.echo(f'No regressions against {baseline}')
+
+CLI_COMMANDS = (
+    init_db_command,
+    rebuild_search_keys_command,
+    rebuild_sales_rollup_command,
+    expire_stock_reservations_command,
+    replay_audit_spill_command,
+    prune_revoked_tokens_command,
+    benchmark_password_hash_command,
+    seed_benchmark_data_command,
+    import_data_command,
+    benchmark_endpoints_command
+)
+
+# Prometheus scrape endpoint; set METRICS_TOKEN to require a bearer token
+def metrics():
+    metrics_token = os.getenv('METRICS_TOKEN')
+    if metrics_token and request.headers.get('Authorization') != f'Bearer {metrics_token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Health check endpoint
-@app.route('/api/health')
 def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'Company Management System API is running',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'startup_ms': current_app.config.get('STARTUP_MS')
     })
 
 # Serve static files (frontend)
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
+    static_folder_path = current_app.static_folder
     if static_folder_path is None:
         return "Static folder not configured", 404
 
@@ -186,6 +460,18 @@ def serve(path):
                 }
             })
 
+# WSGI entry point for gunicorn (src.main:app) and api/index.py
+app = create_app()
+
 if __name__ == '__main__':
+    # Local development: create tables and default data before serving
+    with app.app_context():
+        db.create_all()
+        ensure_search_key_columns()
+        check_unique_barcodes()
+        create_missing_indexes()
+        backfill_search_keys()
+        seed_default_data()
+        ensure_sales_rollup()
+        inventory_search.ensure_index()
     app.run(host='0.0.0.0', port=5000, debug=True)
-
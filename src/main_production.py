@@ -13,6 +13,8 @@ from flask_cors import CORS
 from datetime import datetime, timedelta
 import uuid
 
+from src.services.db_pool import get_engine_options
+
 # إنشاء التطبيق
 app = Flask(__name__)
 
@@ -38,10 +40,7 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?charset=utf8mb4'
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 # إعدادات CORS
 cors_origins = os.environ.get('CORS_ORIGINS', '*').split(',')
@@ -1,13 +1,19 @@
 from src.models.user import db
+from src.services.search_index import search_key_default, track_search_key
 from datetime import datetime
 import uuid
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.Index('idx_inventory_created_id', 'created_at', 'id'),
+        db.Index('idx_inventory_updated', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     product_code = db.Column(db.String(50), unique=True, nullable=False)
     product_name = db.Column(db.String(255), nullable=False)
+    search_key = db.Column(db.String(255), index=True, default=search_key_default('product_name'))
     description = db.Column(db.Text)
     category = db.Column(db.String(100))
     brand = db.Column(db.String(100))
@@ -27,7 +33,7 @@ class Inventory(db.Model):
     unit_of_measure = db.Column(db.String(20), default='piece')
     weight = db.Column(db.Numeric(8, 2))
     dimensions = db.Column(db.String(100))
-    barcode = db.Column(db.String(100))
+    barcode = db.Column(db.String(100), unique=True, index=True)
     
     # Supplier info
     supplier_name = db.Column(db.String(255))
@@ -103,6 +109,48 @@ class Inventory(db.Model):
     def __repr__(self):
         return f'<Inventory {self.product_name}>'
 
+track_search_key(Inventory, 'product_name')
+
+
+class StockReservation(db.Model):
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        db.Index('idx_stock_reservations_status_expires', 'status', 'expires_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.String(36), db.ForeignKey('inventory.id'), nullable=False, index=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    quantity = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    # held: stock taken, order unconfirmed; confirmed: kept for the order;
+    # released/expired: stock returned to inventory
+    status = db.Column(db.String(20), default='held', nullable=False)
+    expires_at = db.Column(db.DateTime)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def is_expired(self):
+        """Check if an unconfirmed reservation has passed its expiry"""
+        return self.status == 'held' and self.expires_at is not None and datetime.utcnow() > self.expires_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'order_id': self.order_id,
+            'quantity': float(self.quantity),
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'is_expired': self.is_expired(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<StockReservation {self.product_id} x {self.quantity}>'
+
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
@@ -4,6 +4,9 @@ import uuid
 
 class Payroll(db.Model):
     __tablename__ = 'payroll'
+    __table_args__ = (
+        db.Index('idx_payroll_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     employee_id = db.Column(db.String(36), db.ForeignKey('employees.id'), nullable=False)
@@ -133,6 +136,10 @@ class Reward(db.Model):
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('idx_orders_date_status', 'order_date', 'status'),
+        db.Index('idx_orders_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     order_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -170,9 +177,11 @@ class Order(db.Model):
     order_items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
     invoices = db.relationship('Invoice', backref='order', lazy='dynamic')
 
-    def calculate_totals(self):
+    def calculate_totals(self, items=None):
         """Calculate order totals based on order items"""
-        self.subtotal = sum(item.subtotal for item in self.order_items)
+        if items is None:
+            items = self.order_items
+        self.subtotal = sum(item.subtotal for item in items)
         self.tax_amount = self.subtotal * (self.tax_rate / 100) if self.tax_rate else 0
         self.total = self.subtotal + self.tax_amount - (self.discount_amount or 0) + (self.shipping_cost or 0)
 
@@ -180,7 +189,9 @@ class Order(db.Model):
         """Get total number of items in order"""
         return self.order_items.count()
 
-    def to_dict(self):
+    def to_dict(self, items_count=None):
+        if items_count is None:
+            items_count = self.get_items_count()
         return {
             'id': self.id,
             'order_number': self.order_number,
@@ -204,7 +215,7 @@ class Order(db.Model):
             'notes': self.notes,
             'internal_notes': self.internal_notes,
             'priority': self.priority,
-            'items_count': self.get_items_count(),
+            'items_count': items_count,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -264,3 +275,41 @@ class OrderItem(db.Model):
     def __repr__(self):
         return f'<OrderItem {self.product_name} x {self.quantity}>'
 
+
+
+# Stored as the rollup's sales_rep_id for orders without a rep. NULLs never
+# conflict in a unique index, so the bucket key columns are all NOT NULL.
+NO_SALES_REP = ''
+
+class DailySalesRollup(db.Model):
+    __tablename__ = 'daily_sales_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('sales_date', 'status', 'sales_rep_id', 'customer_id', name='uq_daily_sales_rollup_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    sales_date = db.Column(db.Date, nullable=False, index=True)
+    status = db.Column(db.String(30), nullable=False)
+    sales_rep_id = db.Column(db.String(36), nullable=False, default=NO_SALES_REP)
+    customer_id = db.Column(db.String(36), db.ForeignKey('customers.id'), nullable=False)
+    
+    # Aggregates
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    total_sales = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sales_date': self.sales_date.isoformat() if self.sales_date else None,
+            'status': self.status,
+            'sales_rep_id': self.sales_rep_id or None,
+            'customer_id': self.customer_id,
+            'order_count': self.order_count,
+            'total_sales': float(self.total_sales) if self.total_sales else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<DailySalesRollup {self.sales_date} {self.status}>'
@@ -1,12 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 
+from src.services.passwords import password_policy
+from src.services.rbac import has_permission
+from src.services.search_index import search_key_default, track_search_key
+
 db = SQLAlchemy()
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('idx_users_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
@@ -27,12 +33,19 @@ class User(db.Model):
     audit_logs = db.relationship('AuditLog', backref='user', lazy='dynamic')
 
     def set_password(self, password):
-        """Set password hash with explicit method"""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Set password hash using the configured hashing policy"""
+        self.password_hash = password_policy.hash(password)
 
     def check_password(self, password):
-        """Check password"""
-        return check_password_hash(self.password_hash, password)
+        """Check password, upgrading the stored hash if the policy has changed
+        
+        The new hash is saved by the caller's next commit.
+        """
+        if not password_policy.verify(self.password_hash, password):
+            return False
+        if password_policy.needs_rehash(self.password_hash):
+            self.password_hash = password_policy.hash(password)
+        return True
     
     def is_admin(self):
         """Check if user is admin"""
@@ -40,31 +53,33 @@ class User(db.Model):
     
     def is_manager(self):
         """Check if user is any type of manager"""
-        return self.role in ['admin', 'hr_manager', 'sales_manager', 'finance_manager', 'logistics_manager', 'warehouse_manager']
+        return has_permission(self.role, 'team')
     
     def can_access_payroll(self):
         """Check if user can access payroll data"""
-        return self.role in ['admin', 'hr_manager', 'finance_manager']
+        return has_permission(self.role, 'payroll')
     
     def can_access_financial_data(self):
         """Check if user can access financial data"""
-        return self.role in ['admin', 'finance_manager']
+        return has_permission(self.role, 'finance')
     
-    def record_login(self):
+    def record_login(self, commit=True):
         """Record successful login"""
         self.last_login = datetime.utcnow()
         self.failed_login_attempts = 0
         self.account_locked_until = None
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def record_failed_login(self):
+    def record_failed_login(self, commit=True):
         """Record failed login attempt"""
-        self.failed_login_attempts += 1
+        self.failed_login_attempts = (self.failed_login_attempts or 0) + 1
         if self.failed_login_attempts >= 5:
             # Lock account for 30 minutes
             from datetime import timedelta
             self.account_locked_until = datetime.utcnow() + timedelta(minutes=30)
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
     def is_account_locked(self):
         """Check if account is locked"""
@@ -88,11 +103,36 @@ class User(db.Model):
         return f'<User {self.email}>'
 
 
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    token_type = db.Column(db.String(20), default='access')
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'jti': self.jti,
+            'token_type': self.token_type,
+            'user_id': self.user_id,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'expires_at': self.expires_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+
+
 class Department(db.Model):
     __tablename__ = 'departments'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), unique=True, nullable=False)
+    search_key = db.Column(db.String(255), index=True, default=search_key_default('name'))
     description = db.Column(db.Text)
     manager_id = db.Column(db.String(36), db.ForeignKey('employees.id'))
     is_active = db.Column(db.Boolean, default=True)
@@ -118,14 +158,20 @@ class Department(db.Model):
     def __repr__(self):
         return f'<Department {self.name}>'
 
+track_search_key(Department, 'name')
+
 
 class Employee(db.Model):
     __tablename__ = 'employees'
+    __table_args__ = (
+        db.Index('idx_employees_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     employee_number = db.Column(db.String(20), unique=True, nullable=False)
     full_name = db.Column(db.String(255), nullable=False)
+    search_key = db.Column(db.String(255), index=True, default=search_key_default('full_name'))
     phone = db.Column(db.String(20))
     address = db.Column(db.Text)
     department_id = db.Column(db.String(36), db.ForeignKey('departments.id'))
@@ -189,12 +235,19 @@ class Employee(db.Model):
     def __repr__(self):
         return f'<Employee {self.full_name}>'
 
+track_search_key(Employee, 'full_name')
+
 
 class Customer(db.Model):
     __tablename__ = 'customers'
+    __table_args__ = (
+        db.Index('idx_customers_created_id', 'created_at', 'id'),
+        db.Index('idx_customers_updated', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(255), nullable=False)
+    search_key = db.Column(db.String(255), index=True, default=search_key_default('name'))
     email = db.Column(db.String(255), unique=True)
     phone = db.Column(db.String(20))
     address = db.Column(db.Text)
@@ -236,3 +289,5 @@ class Customer(db.Model):
     def __repr__(self):
         return f'<Customer {self.name}>'
 
+track_search_key(Customer, 'name')
+
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from datetime import datetime, timedelta
 import pyotp
 import qrcode
@@ -7,26 +9,30 @@ import io
 import base64
 
 from src.models.user import db, User, Employee
-from src.models.inventory import AuditLog
+from src.services.audit import build_audit_event, log_audit_events
+from src.services.auth import AuthBusyError, get_user_with_employee, verify_password
+from src.services.token_revocation import token_revocation
 
 auth_bp = Blueprint('auth', __name__)
 
-def log_audit(user_id, operation, description, ip_address=None, user_agent=None):
+def log_audit(user_id, operation, description, ip_address=None, user_agent=None, user_email=None):
     """Helper function to log audit events"""
     try:
-        audit_log = AuditLog(
+        if user_id and not user_email:
+            user_email = User.query.get(user_id).email
+        
+        event = build_audit_event(
             table_name='auth',
             record_id=user_id or 'unknown',
             operation=operation,
             user_id=user_id,
-            user_email=User.query.get(user_id).email if user_id else None,
+            user_email=user_email,
             description=description,
-            ip_address=ip_address or request.remote_addr,
-            user_agent=user_agent or request.headers.get('User-Agent'),
             severity='info' if operation in ['LOGIN', 'LOGOUT'] else 'warning'
         )
-        db.session.add(audit_log)
-        db.session.commit()
+        event['ip_address'] = ip_address or event['ip_address']
+        event['user_agent'] = user_agent or event['user_agent']
+        log_audit_events([event])
     except Exception as e:
         print(f"Audit log error: {e}")
 
@@ -42,26 +48,26 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
         
-        # Find user
-        user = User.query.filter_by(email=email).first()
+        # Find user and employee in one query
+        user, employee = get_user_with_employee(email=email)
         if not user:
             log_audit(None, 'LOGIN_FAILED', f'Login attempt with non-existent email: {email}')
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Check if account is locked
         if user.is_account_locked():
-            log_audit(user.id, 'LOGIN_FAILED', 'Login attempt on locked account')
+            log_audit(user.id, 'LOGIN_FAILED', 'Login attempt on locked account', user_email=user.email)
             return jsonify({'error': 'Account is temporarily locked due to multiple failed attempts'}), 401
         
         # Check if account is active
         if not user.is_active:
-            log_audit(user.id, 'LOGIN_FAILED', 'Login attempt on inactive account')
+            log_audit(user.id, 'LOGIN_FAILED', 'Login attempt on inactive account', user_email=user.email)
             return jsonify({'error': 'Account is deactivated'}), 401
         
-        # Verify password
-        if not user.check_password(password):
+        # Verify password on the bounded hash pool
+        if not verify_password(user, password):
             user.record_failed_login()
-            log_audit(user.id, 'LOGIN_FAILED', 'Invalid password attempt')
+            log_audit(user.id, 'LOGIN_FAILED', 'Invalid password attempt', user_email=user.email)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Check 2FA if enabled
@@ -76,14 +82,12 @@ def login():
             totp = pyotp.TOTP(user.two_factor_secret)
             if not totp.verify(two_factor_code, valid_window=1):
                 user.record_failed_login()
-                log_audit(user.id, 'LOGIN_FAILED', 'Invalid 2FA code')
+                log_audit(user.id, 'LOGIN_FAILED', 'Invalid 2FA code', user_email=user.email)
                 return jsonify({'error': 'Invalid two-factor authentication code'}), 401
         
-        # Successful login
-        user.record_login()
-        
-        # Get employee data
-        employee = Employee.query.filter_by(user_id=user.id).first()
+        # Serialize before the commit so the response needs no reload
+        user_data = user.to_dict()
+        employee_data = employee.to_dict() if employee else None
         
         # Create tokens
         access_token = create_access_token(
@@ -96,17 +100,26 @@ def login():
         )
         refresh_token = create_refresh_token(identity=user.id)
         
-        log_audit(user.id, 'LOGIN', 'Successful login')
+        # Successful login
+        user.record_login(commit=False)
+        user_data['last_login'] = user.last_login.isoformat()
+        db.session.commit()
+        
+        log_audit(user_data['id'], 'LOGIN', 'Successful login', user_email=user_data['email'])
         
         return jsonify({
             'access_token': access_token,
             'refresh_token': refresh_token,
-            'user': user.to_dict(),
-            'employee': employee.to_dict() if employee else None,
-            'redirect_url': get_redirect_url_for_role(user.role)
+            'user': user_data,
+            'employee': employee_data,
+            'redirect_url': get_redirect_url_for_role(user_data['role'])
         }), 200
+    
+    except AuthBusyError:
+        return jsonify({'error': 'Login service is busy, please retry'}), 503, {'Retry-After': '1'}
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Login failed', 'details': str(e)}), 500
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -115,13 +128,11 @@ def refresh():
     """Refresh access token"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user, employee = get_user_with_employee(user_id=current_user_id)
         
         if not user or not user.is_active:
             return jsonify({'error': 'User not found or inactive'}), 401
         
-        employee = Employee.query.filter_by(user_id=user.id).first()
-        
         new_token = create_access_token(
             identity=user.id,
             additional_claims={
@@ -142,12 +153,26 @@ def logout():
     """User logout endpoint"""
     try:
         current_user_id = get_jwt_identity()
+        
+        # Revoke the access token, and the refresh token if the client sends it
+        token_revocation.revoke(get_jwt())
+        
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                refresh_payload = decode_token(data['refresh_token'])
+            except (PyJWTError, JWTExtendedException):
+                # Invalid, expired or foreign: nothing usable to revoke, the access token is still logged out
+                refresh_payload = None
+            if refresh_payload and refresh_payload.get('type') == 'refresh' and refresh_payload.get('sub') == current_user_id:
+                token_revocation.revoke(refresh_payload)
+        
         log_audit(current_user_id, 'LOGOUT', 'User logged out')
         
-        # In a production environment, you might want to blacklist the token
         return jsonify({'message': 'Successfully logged out'}), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Logout failed', 'details': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+
+from src.services.autocomplete import autocomplete, AUTOCOMPLETE_ENTITIES
+from src.services.rbac import has_permission
+
+autocomplete_bp = Blueprint('autocomplete', __name__)
+
+@autocomplete_bp.route('/<entity>', methods=['GET'])
+@jwt_required()
+def get_suggestions(entity):
+    """Get type-ahead suggestions for customers or products by name or code prefix"""
+    try:
+        if entity not in AUTOCOMPLETE_ENTITIES:
+            return jsonify({'error': 'Unknown entity'}), 404
+        
+        if not has_permission(get_jwt().get('role'), *AUTOCOMPLETE_ENTITIES[entity][4]):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+        
+        prefix = request.args.get('prefix', '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        
+        if not prefix:
+            return jsonify({'error': 'prefix is required'}), 400
+        
+        return jsonify({
+            'prefix': prefix,
+            'results': autocomplete.search(entity, prefix, limit)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to get suggestions', 'details': str(e)}), 500
@@ -1,28 +1,20 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from src.models.user import db, Customer
-from src.models.inventory import AuditLog
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.serializers import order_eager_options, serialize_orders
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.rbac import require_permission
+from src.services.search_index import normalize_text, prefix_condition
 
 customers_bp = Blueprint('customers', __name__)
 
-def require_sales_access():
-    """Decorator to require sales access"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'sales_manager', 'sales_rep', 'customer_support']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @customers_bp.route('/', methods=['GET'])
 @jwt_required()
-@require_sales_access()
+@require_permission('customers')
 def get_customers():
     """Get all customers with pagination and filtering"""
     try:
@@ -31,6 +23,7 @@ def get_customers():
         customer_type = request.args.get('customer_type')
         is_active = request.args.get('is_active')
         search = request.args.get('search', '').strip()
+        prefix = normalize_text(request.args.get('prefix', ''))
         
         query = Customer.query
         
@@ -44,42 +37,36 @@ def get_customers():
         if search:
             query = query.filter(
                 db.or_(
-                    Customer.name.contains(search),
+                    Customer.search_key.contains(normalize_text(search)),
                     Customer.email.contains(search),
                     Customer.company_name.contains(search)
                 )
             )
         
-        # Order by creation date
-        query = query.order_by(Customer.created_at.desc())
+        # Name prefix matches are read from the search_key index in name order
+        if prefix:
+            query = query.filter(prefix_condition(Customer.search_key, prefix)).order_by(Customer.search_key)
+        else:
+            query = query.order_by(Customer.created_at.desc())
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, Customer, page, per_page, request.args.get('cursor'))
         
-        customers = [customer.to_dict() for customer in pagination.items]
+        customers = [customer.to_dict() for customer in items]
         
         return jsonify({
             'customers': customers,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
         
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get customers', 'details': str(e)}), 500
 
 @customers_bp.route('/<customer_id>', methods=['GET'])
 @jwt_required()
-@require_sales_access()
+@require_permission('customers')
 def get_customer(customer_id):
     """Get specific customer by ID"""
     try:
@@ -90,10 +77,10 @@ def get_customer(customer_id):
         customer_data = customer.to_dict()
         
         # Add recent orders
-        recent_orders = customer.orders.order_by(
+        recent_orders = customer.orders.options(*order_eager_options()).order_by(
             db.desc('order_date')
         ).limit(5).all()
-        customer_data['recent_orders'] = [order.to_dict() for order in recent_orders]
+        customer_data['recent_orders'] = serialize_orders(recent_orders)
         
         return jsonify(customer_data), 200
         
@@ -102,7 +89,7 @@ def get_customer(customer_id):
 
 @customers_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_sales_access()
+@require_permission('customers')
 def create_customer():
     """Create new customer"""
     try:
@@ -134,19 +121,17 @@ def create_customer():
         db.session.add(customer)
         db.session.flush()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='customers',
             record_id=customer.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=customer.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(customer)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('customers')
         
         return jsonify({
             'message': 'Customer created successfully',
@@ -159,7 +144,7 @@ def create_customer():
 
 @customers_bp.route('/<customer_id>', methods=['PUT'])
 @jwt_required()
-@require_sales_access()
+@require_permission('customers')
 def update_customer(customer_id):
     """Update customer"""
     try:
@@ -170,7 +155,7 @@ def update_customer(customer_id):
             return jsonify({'error': 'Customer not found'}), 404
         
         data = request.get_json()
-        old_values = customer.to_dict()
+        old_values = model_snapshot(customer)
         
         # Update allowed fields
         if 'name' in data:
@@ -207,20 +192,18 @@ def update_customer(customer_id):
         
         customer.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='customers',
             record_id=customer.id,
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=customer.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(customer)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('customers')
         
         return jsonify({
             'message': 'Customer updated successfully',
@@ -233,7 +216,7 @@ def update_customer(customer_id):
 
 @customers_bp.route('/<customer_id>/orders', methods=['GET'])
 @jwt_required()
-@require_sales_access()
+@require_permission('customers')
 def get_customer_orders(customer_id):
     """Get customer orders"""
     try:
@@ -245,7 +228,7 @@ def get_customer_orders(customer_id):
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         status = request.args.get('status')
         
-        query = customer.orders
+        query = customer.orders.options(*order_eager_options())
         
         if status:
             query = query.filter_by(status=status)
@@ -258,7 +241,7 @@ def get_customer_orders(customer_id):
             error_out=False
         )
         
-        orders = [order.to_dict() for order in pagination.items]
+        orders = serialize_orders(pagination.items)
         
         return jsonify({
             'orders': orders,
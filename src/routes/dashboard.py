@@ -4,11 +4,59 @@ from datetime import datetime, date, timedelta
 from sqlalchemy import func, extract
 
 from src.models.user import db, Employee, Customer, Department
-from src.models.payroll import Order, Payroll, Reward
+from src.models.payroll import Order, Payroll, Reward, DailySalesRollup
 from src.models.inventory import Inventory, Invoice, Expense, Notification
+from src.services.serializers import order_eager_options, serialize_orders
+from src.services.sales_rollup import rollup_query, get_sales_totals
+from src.services.dashboard_cache import dashboard_cache, get_dashboard_cache_key, invalidate_user_dashboard
+from src.services.rbac import has_permission
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Supported sales trend windows in months
+TREND_WINDOWS = (6, 12, 24)
+
+def add_months(month_start, months):
+    """Shift the first day of a month by a number of calendar months"""
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def get_monthly_sales_trend(months, today=None):
+    """Get delivered/shipped sales per calendar month, oldest first
+
+    Uses a single range-bounded query over the daily sales rollup grouped by
+    year and month.
+    """
+    today = today or date.today()
+    window_end = add_months(today.replace(day=1), 1)
+    window_start = add_months(window_end, -months)
+    
+    sales_year = extract('year', DailySalesRollup.sales_date)
+    sales_month = extract('month', DailySalesRollup.sales_date)
+    
+    rows = db.session.query(
+        sales_year,
+        sales_month,
+        func.sum(DailySalesRollup.total_sales)
+    ).filter(
+        DailySalesRollup.sales_date >= window_start,
+        DailySalesRollup.sales_date < window_end,
+        DailySalesRollup.status.in_(['delivered', 'shipped'])
+    ).group_by(sales_year, sales_month).all()
+    
+    sales_by_month = {(int(year), int(month)): total for year, month, total in rows}
+    
+    trend = []
+    for i in range(months):
+        month_start = add_months(window_start, i)
+        month_sales = sales_by_month.get((month_start.year, month_start.month)) or 0
+        trend.append({
+            'month': month_start.strftime('%Y-%m'),
+            'sales': float(month_sales)
+        })
+    
+    return trend
+
 @dashboard_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_dashboard():
@@ -19,50 +67,74 @@ def get_dashboard():
         employee_id = claims.get('employee_id')
         current_user_id = get_jwt_identity()
         
-        if user_role == 'admin':
-            return get_admin_dashboard()
-        elif user_role == 'hr_manager':
-            return get_hr_dashboard()
-        elif user_role == 'sales_manager':
-            return get_sales_manager_dashboard()
-        elif user_role == 'finance_manager':
-            return get_finance_dashboard()
-        elif user_role == 'logistics_manager':
-            return get_logistics_dashboard()
-        elif user_role == 'warehouse_manager':
-            return get_warehouse_dashboard()
-        elif user_role == 'sales_rep':
-            return get_sales_rep_dashboard(employee_id)
-        elif user_role == 'employee':
-            return get_employee_dashboard(employee_id)
-        elif user_role == 'customer_support':
-            return get_support_dashboard()
-        else:
+        dashboard_handlers = {
+            'admin': get_admin_dashboard,
+            'hr_manager': get_hr_dashboard,
+            'sales_manager': get_sales_manager_dashboard,
+            'finance_manager': get_finance_dashboard,
+            'logistics_manager': get_logistics_dashboard,
+            'warehouse_manager': get_warehouse_dashboard,
+            'sales_rep': lambda: get_sales_rep_dashboard(employee_id),
+            'employee': lambda: get_employee_dashboard(employee_id),
+            'customer_support': get_support_dashboard
+        }
+        
+        if user_role not in dashboard_handlers:
             return jsonify({'error': 'Invalid role'}), 400
+        
+        cache_key = get_dashboard_cache_key(
+            user_role,
+            user_id=current_user_id,
+            employee_id=employee_id,
+            months=request.args.get('months', 6, type=int)
+        )
+        # Admins can pass ?refresh=true to recompute instead of reading the cache
+        refresh = request.args.get('refresh', '').lower() == 'true' and has_permission(user_role, 'admin')
+        cached_data = None if refresh else dashboard_cache.get(cache_key)
+        if cached_data is not None:
+            return jsonify(cached_data), 200
+        
+        response, status_code = dashboard_handlers[user_role]()
+        if status_code == 200:
+            dashboard_cache.set(cache_key, response.get_json())
+        
+        return response, status_code
             
     except Exception as e:
         return jsonify({'error': 'Failed to get dashboard data', 'details': str(e)}), 500
 
+@dashboard_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_dashboard_cache_stats():
+    """Get dashboard cache hit/miss counters"""
+    claims = get_jwt()
+    if not has_permission(claims.get('role'), 'admin'):
+        return jsonify({'error': 'Insufficient permissions'}), 403
+    
+    return jsonify(dashboard_cache.stats()), 200
+
 def get_admin_dashboard():
     """Get admin dashboard data"""
     today = date.today()
     current_month_start = today.replace(day=1)
     
+    trend_months = request.args.get('months', 6, type=int)
+    if trend_months not in TREND_WINDOWS:
+        return jsonify({'error': 'Invalid trend window'}), 400
+    
     # Key metrics
     total_employees = Employee.query.filter_by(is_active=True).count()
     total_customers = Customer.query.filter_by(is_active=True).count()
-    total_orders = Order.query.count()
+    total_orders, _ = get_sales_totals()
     
     # Monthly sales
-    monthly_sales = db.session.query(
-        func.sum(Order.total)
-    ).filter(
-        Order.order_date >= current_month_start,
-        Order.status.in_(['delivered', 'shipped'])
-    ).scalar() or 0
+    _, monthly_sales = get_sales_totals(
+        start_date=current_month_start,
+        statuses=['delivered', 'shipped']
+    )
     
     # Pending orders
-    pending_orders = Order.query.filter_by(status='pending').count()
+    pending_orders, _ = get_sales_totals(statuses=['pending'])
     
     # Low stock items
     low_stock_count = Inventory.query.filter(
@@ -76,22 +148,8 @@ def get_admin_dashboard():
         is_read=False
     ).order_by(Notification.created_at.desc()).limit(5).all()
     
-    # Monthly trends (last 6 months)
-    monthly_trends = []
-    for i in range(6):
-        month_date = today.replace(day=1) - timedelta(days=30*i)
-        month_sales = db.session.query(
-            func.sum(Order.total)
-        ).filter(
-            extract('month', Order.order_date) == month_date.month,
-            extract('year', Order.order_date) == month_date.year,
-            Order.status.in_(['delivered', 'shipped'])
-        ).scalar() or 0
-        
-        monthly_trends.append({
-            'month': month_date.strftime('%Y-%m'),
-            'sales': float(month_sales)
-        })
+    # Monthly trends (last N calendar months)
+    monthly_trends = get_monthly_sales_trend(trend_months, today)
     
     return jsonify({
         'role': 'admin',
@@ -104,7 +162,7 @@ def get_admin_dashboard():
             'low_stock_items': low_stock_count
         },
         'notifications': [notif.to_dict() for notif in notifications],
-        'monthly_trends': monthly_trends[::-1]  # Reverse to show oldest first
+        'monthly_trends': monthly_trends
     }), 200
 
 def get_hr_dashboard():
@@ -165,38 +223,31 @@ def get_sales_manager_dashboard():
     current_month_start = today.replace(day=1)
     
     # Sales metrics
-    total_orders = Order.query.count()
-    monthly_orders = Order.query.filter(
-        Order.order_date >= current_month_start
-    ).count()
-    
-    monthly_sales = db.session.query(
-        func.sum(Order.total)
-    ).filter(
-        Order.order_date >= current_month_start
-    ).scalar() or 0
-    
-    pending_orders = Order.query.filter_by(status='pending').count()
+    total_orders, _ = get_sales_totals()
+    monthly_orders, monthly_sales = get_sales_totals(start_date=current_month_start)
+    pending_orders, _ = get_sales_totals(statuses=['pending'])
     
     # Top customers this month
-    top_customers = db.session.query(
+    top_customers = rollup_query(
         Customer.name,
-        func.sum(Order.total).label('total_value')
-    ).join(Order).filter(
-        Order.order_date >= current_month_start
+        func.sum(DailySalesRollup.total_sales).label('total_value'),
+        start_date=current_month_start
+    ).join(
+        Customer, Customer.id == DailySalesRollup.customer_id
     ).group_by(Customer.id, Customer.name).order_by(
-        func.sum(Order.total).desc()
+        func.sum(DailySalesRollup.total_sales).desc()
     ).limit(5).all()
     
     # Sales team performance
-    sales_team = db.session.query(
+    sales_team = rollup_query(
         Employee.full_name,
-        func.count(Order.id).label('order_count'),
-        func.sum(Order.total).label('total_sales')
-    ).join(Order, Employee.id == Order.sales_rep_id).filter(
-        Order.order_date >= current_month_start
+        func.sum(DailySalesRollup.order_count).label('order_count'),
+        func.sum(DailySalesRollup.total_sales).label('total_sales'),
+        start_date=current_month_start
+    ).join(
+        Employee, Employee.id == DailySalesRollup.sales_rep_id
     ).group_by(Employee.id, Employee.full_name).order_by(
-        func.sum(Order.total).desc()
+        func.sum(DailySalesRollup.total_sales).desc()
     ).all()
     
     return jsonify({
@@ -214,7 +265,7 @@ def get_sales_manager_dashboard():
         'sales_team_performance': [
             {
                 'name': name,
-                'order_count': order_count,
+                'order_count': int(order_count),
                 'total_sales': float(total_sales)
             }
             for name, order_count, total_sales in sales_team
@@ -227,12 +278,10 @@ def get_finance_dashboard():
     current_month_start = today.replace(day=1)
     
     # Financial metrics
-    monthly_revenue = db.session.query(
-        func.sum(Order.total)
-    ).filter(
-        Order.order_date >= current_month_start,
-        Order.status.in_(['delivered', 'shipped'])
-    ).scalar() or 0
+    _, monthly_revenue = get_sales_totals(
+        start_date=current_month_start,
+        statuses=['delivered', 'shipped']
+    )
     
     monthly_expenses = db.session.query(
         func.sum(Expense.total_amount)
@@ -269,10 +318,10 @@ def get_finance_dashboard():
 def get_logistics_dashboard():
     """Get logistics manager dashboard data"""
     # Orders by status
-    orders_by_status = db.session.query(
-        Order.status,
-        func.count(Order.id).label('count')
-    ).group_by(Order.status).all()
+    orders_by_status = rollup_query(
+        DailySalesRollup.status,
+        func.sum(DailySalesRollup.order_count).label('count')
+    ).group_by(DailySalesRollup.status).all()
     
     # Urgent orders
     urgent_orders = Order.query.filter_by(priority='urgent').count()
@@ -290,7 +339,7 @@ def get_logistics_dashboard():
             'orders_to_ship': orders_to_ship
         },
         'orders_by_status': [
-            {'status': status, 'count': count}
+            {'status': status, 'count': int(count)}
             for status, count in orders_by_status
         ]
     }), 200
@@ -326,30 +375,26 @@ def get_warehouse_dashboard():
 
 def get_sales_rep_dashboard(employee_id):
     """Get sales rep dashboard data"""
+    if not employee_id:
+        return jsonify({'error': 'Employee record not found'}), 404
+    
     today = date.today()
     current_month_start = today.replace(day=1)
     
     # My orders this month
-    my_orders_count = Order.query.filter(
-        Order.sales_rep_id == employee_id,
-        Order.order_date >= current_month_start
-    ).count()
-    
-    my_sales_value = db.session.query(
-        func.sum(Order.total)
-    ).filter(
-        Order.sales_rep_id == employee_id,
-        Order.order_date >= current_month_start
-    ).scalar() or 0
+    my_orders_count, my_sales_value = get_sales_totals(
+        start_date=current_month_start,
+        sales_rep_id=employee_id
+    )
     
     # Pending orders
-    pending_orders = Order.query.filter(
-        Order.sales_rep_id == employee_id,
-        Order.status == 'pending'
-    ).count()
+    pending_orders, _ = get_sales_totals(
+        statuses=['pending'],
+        sales_rep_id=employee_id
+    )
     
     # Recent orders
-    recent_orders = Order.query.filter(
+    recent_orders = Order.query.options(*order_eager_options()).filter(
         Order.sales_rep_id == employee_id
     ).order_by(Order.created_at.desc()).limit(5).all()
     
@@ -360,7 +405,7 @@ def get_sales_rep_dashboard(employee_id):
             'my_sales_value': float(my_sales_value),
             'pending_orders': pending_orders
         },
-        'recent_orders': [order.to_dict() for order in recent_orders]
+        'recent_orders': serialize_orders(recent_orders)
     }), 200
 
 def get_employee_dashboard(employee_id):
@@ -458,6 +503,7 @@ def mark_notification_read(notification_id):
             return jsonify({'error': 'Notification not found'}), 404
         
         notification.mark_as_read()
+        invalidate_user_dashboard(current_user_id)
         
         return jsonify({'message': 'Notification marked as read'}), 200
         
@@ -1,25 +1,14 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from src.models.user import db, Department, Employee
-from src.models.inventory import AuditLog
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.rbac import require_permission
+from src.services.search_index import normalize_text, prefix_condition
 
 departments_bp = Blueprint('departments', __name__)
 
-def require_admin_or_hr():
-    """Decorator to require admin or HR manager role"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'hr_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @departments_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_departments():
@@ -27,6 +16,7 @@ def get_departments():
     try:
         is_active = request.args.get('is_active')
         search = request.args.get('search', '').strip()
+        prefix = normalize_text(request.args.get('prefix', ''))
         
         query = Department.query
         
@@ -35,7 +25,10 @@ def get_departments():
             query = query.filter(Department.is_active == (is_active.lower() == 'true'))
         
         if search:
-            query = query.filter(Department.name.contains(search))
+            query = query.filter(Department.search_key.contains(normalize_text(search)))
+        
+        if prefix:
+            query = query.filter(prefix_condition(Department.search_key, prefix))
         
         # Order by name
         departments = query.order_by(Department.name).all()
@@ -73,7 +66,7 @@ def get_department(department_id):
 
 @departments_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def create_department():
     """Create new department"""
     try:
@@ -106,19 +99,16 @@ def create_department():
         db.session.add(department)
         db.session.flush()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='departments',
             record_id=department.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=department.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(department)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
         
         return jsonify({
             'message': 'Department created successfully',
@@ -131,7 +121,7 @@ def create_department():
 
 @departments_bp.route('/<department_id>', methods=['PUT'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def update_department(department_id):
     """Update department"""
     try:
@@ -142,7 +132,7 @@ def update_department(department_id):
             return jsonify({'error': 'Department not found'}), 404
         
         data = request.get_json()
-        old_values = department.to_dict()
+        old_values = model_snapshot(department)
         
         # Update allowed fields
         if 'name' in data:
@@ -168,20 +158,17 @@ def update_department(department_id):
         
         department.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='departments',
             record_id=department.id,
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=department.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(department)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
         
         return jsonify({
             'message': 'Department updated successfully',
@@ -194,7 +181,7 @@ def update_department(department_id):
 
 @departments_bp.route('/<department_id>', methods=['DELETE'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def delete_department(department_id):
     """Delete department (soft delete by deactivating)"""
     try:
@@ -211,26 +198,23 @@ def delete_department(department_id):
                 'error': f'Cannot delete department with {active_employees} active employees. Please reassign employees first.'
             }), 400
         
-        old_values = department.to_dict()
+        old_values = model_snapshot(department)
         
         # Soft delete by deactivating
         department.is_active = False
         department.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='departments',
             record_id=department.id,
             operation='DELETE',
             user_id=current_user_id,
             old_values=old_values,
-            description=f'Department {department.name} deactivated',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            description=f'Department {department.name} deactivated'
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
         
         return jsonify({'message': 'Department deactivated successfully'}), 200
         
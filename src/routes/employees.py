@@ -3,23 +3,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime
 
 from src.models.user import db, Employee, Department
-from src.models.inventory import AuditLog
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.rbac import require_permission, has_permission
+from src.services.search_index import normalize_text, prefix_condition
 
 employees_bp = Blueprint('employees', __name__)
 
-def require_admin_or_hr():
-    """Decorator to require admin or HR manager role"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'hr_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @employees_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_employees():
@@ -31,6 +22,7 @@ def get_employees():
         position = request.args.get('position')
         employment_status = request.args.get('employment_status')
         search = request.args.get('search', '').strip()
+        prefix = normalize_text(request.args.get('prefix', ''))
         
         query = Employee.query
         
@@ -47,35 +39,29 @@ def get_employees():
         if search:
             query = query.filter(
                 db.or_(
-                    Employee.full_name.contains(search),
+                    Employee.search_key.contains(normalize_text(search)),
                     Employee.employee_number.contains(search)
                 )
             )
         
-        # Order by creation date
-        query = query.order_by(Employee.created_at.desc())
+        # Name prefix matches are read from the search_key index in name order
+        if prefix:
+            query = query.filter(prefix_condition(Employee.search_key, prefix)).order_by(Employee.search_key)
+        else:
+            query = query.order_by(Employee.created_at.desc())
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, Employee, page, per_page, request.args.get('cursor'))
         
-        employees = [emp.to_dict() for emp in pagination.items]
+        employees = [emp.to_dict() for emp in items]
         
         return jsonify({
             'employees': employees,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
         
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get employees', 'details': str(e)}), 500
 
@@ -91,7 +77,7 @@ def get_employee(employee_id):
         
         # Employees can view their own profile, managers can view their team
         if (employee_id != employee_id_from_token and 
-            user_role not in ['admin', 'hr_manager'] and
+            not has_permission(user_role, 'hr') and
             not is_manager_of_employee(current_user_id, employee_id)):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
@@ -106,7 +92,7 @@ def get_employee(employee_id):
 
 @employees_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def create_employee():
     """Create new employee"""
     try:
@@ -166,19 +152,17 @@ def create_employee():
         db.session.add(employee)
         db.session.flush()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='employees',
             record_id=employee.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=employee.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(employee)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('employees', employee_id=employee.id)
         
         return jsonify({
             'message': 'Employee created successfully',
@@ -191,7 +175,7 @@ def create_employee():
 
 @employees_bp.route('/<employee_id>', methods=['PUT'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def update_employee(employee_id):
     """Update employee"""
     try:
@@ -202,7 +186,7 @@ def update_employee(employee_id):
             return jsonify({'error': 'Employee not found'}), 404
         
         data = request.get_json()
-        old_values = employee.to_dict()
+        old_values = model_snapshot(employee)
         
         # Update allowed fields
         if 'full_name' in data:
@@ -251,20 +235,18 @@ def update_employee(employee_id):
         
         employee.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='employees',
             record_id=employee.id,
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=employee.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(employee)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('employees', employee_id=employee.id)
         
         return jsonify({
             'message': 'Employee updated successfully',
@@ -287,7 +269,7 @@ def get_employee_rewards(employee_id):
         
         # Check permissions
         if (employee_id != employee_id_from_token and 
-            user_role not in ['admin', 'hr_manager'] and
+            not has_permission(user_role, 'hr') and
             not is_manager_of_employee(current_user_id, employee_id)):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
@@ -364,7 +346,7 @@ def get_my_team():
             return jsonify({'error': 'Employee record not found'}), 404
         
         # Only managers can view their team
-        if not user_role.endswith('_manager') and user_role != 'admin':
+        if not has_permission(user_role, 'team'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         employee = Employee.query.get(employee_id)
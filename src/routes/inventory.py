@@ -1,28 +1,23 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from src.models.user import db
-from src.models.inventory import Inventory, AuditLog
+from src.models.inventory import Inventory
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.stock_reservation import take_stock, return_stock
+from src.services.rbac import require_permission
+from src.services.inventory_search import inventory_search
+from src.services.search_index import normalize_text, prefix_condition
+from src.services.inventory_lookup import inventory_lookup_cache, lookup_inventory_item, invalidate_inventory_lookup
 
 inventory_bp = Blueprint('inventory', __name__)
 
-def require_inventory_access():
-    """Decorator to require inventory access"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'warehouse_manager', 'logistics_manager', 'sales_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @inventory_bp.route('/', methods=['GET'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def get_inventory():
     """Get all inventory items with pagination and filtering"""
     try:
@@ -33,6 +28,7 @@ def get_inventory():
         is_active = request.args.get('is_active')
         low_stock = request.args.get('low_stock')
         search = request.args.get('search', '').strip()
+        prefix = normalize_text(request.args.get('prefix', ''))
         
         query = Inventory.query
         
@@ -50,44 +46,68 @@ def get_inventory():
             query = query.filter(Inventory.quantity_in_stock <= Inventory.minimum_stock_level)
         
         if search:
-            query = query.filter(
-                db.or_(
-                    Inventory.product_name.contains(search),
-                    Inventory.product_code.contains(search),
-                    Inventory.barcode.contains(search)
-                )
-            )
-        
-        # Order by creation date
-        query = query.order_by(Inventory.created_at.desc())
-        
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+            # Ranked ids from the search index, exact code/barcode hits first
+            ranked_ids = inventory_search.search_ids(search)
+            query = query.filter(Inventory.id.in_(ranked_ids))
+        
+        if prefix:
+            query = query.filter(prefix_condition(Inventory.search_key, prefix))
+        
+        # Order by relevance when searching, by name for prefix matches, otherwise by creation date
+        if search and ranked_ids:
+            relevance = db.case({item_id: rank for rank, item_id in enumerate(ranked_ids)}, value=Inventory.id)
+            query = query.order_by(relevance, Inventory.created_at.desc())
+        elif prefix:
+            query = query.order_by(Inventory.search_key)
+        else:
+            query = query.order_by(Inventory.created_at.desc())
+        
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, Inventory, page, per_page, request.args.get('cursor'))
         
-        inventory_items = [item.to_dict() for item in pagination.items]
+        inventory_items = [item.to_dict() for item in items]
         
         return jsonify({
             'inventory': inventory_items,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
-        
+    
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get inventory', 'details': str(e)}), 500
 
+@inventory_bp.route('/lookup', methods=['GET'])
+@jwt_required()
+@require_permission('inventory')
+def lookup_inventory_item_by_key():
+    """Get an inventory item by exact barcode or product code, for scanners"""
+    try:
+        barcode = request.args.get('barcode', '').strip()
+        code = request.args.get('code', '').strip()
+        
+        if not barcode and not code:
+            return jsonify({'error': 'barcode or code is required'}), 400
+        
+        item_data = lookup_inventory_item(barcode=barcode, code=code)
+        if item_data is None:
+            return jsonify({'error': 'Inventory item not found'}), 404
+        
+        return jsonify(item_data), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to look up inventory item', 'details': str(e)}), 500
+
+@inventory_bp.route('/lookup/cache-stats', methods=['GET'])
+@jwt_required()
+@require_permission('admin')
+def get_lookup_cache_stats():
+    """Get barcode/code lookup cache hit/miss counters"""
+    return jsonify(inventory_lookup_cache.stats()), 200
+
 @inventory_bp.route('/<item_id>', methods=['GET'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def get_inventory_item(item_id):
     """Get specific inventory item by ID"""
     try:
@@ -96,13 +116,13 @@ def get_inventory_item(item_id):
             return jsonify({'error': 'Inventory item not found'}), 404
         
         return jsonify(item.to_dict()), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get inventory item', 'details': str(e)}), 500
 
 @inventory_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def create_inventory_item():
     """Create new inventory item"""
     try:
@@ -120,6 +140,10 @@ def create_inventory_item():
         if existing_item:
             return jsonify({'error': 'Product code already exists'}), 400
         
+        # Barcodes are unique when set
+        if data.get('barcode') and Inventory.query.filter_by(barcode=data['barcode']).first():
+            return jsonify({'error': 'Barcode already exists'}), 400
+        
         # Create inventory item
         item = Inventory(
             product_code=data['product_code'],
@@ -137,7 +161,7 @@ def create_inventory_item():
             unit_of_measure=data.get('unit_of_measure', 'piece'),
             weight=data.get('weight'),
             dimensions=data.get('dimensions'),
-            barcode=data.get('barcode'),
+            barcode=data.get('barcode') or None,
             supplier_name=data.get('supplier_name'),
             supplier_contact=data.get('supplier_contact'),
             supplier_part_number=data.get('supplier_part_number'),
@@ -149,32 +173,31 @@ def create_inventory_item():
         db.session.add(item)
         db.session.flush()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='inventory',
             record_id=item.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=item.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(item)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('inventory')
+        inventory_search.record_changed(item)
         
         return jsonify({
             'message': 'Inventory item created successfully',
             'item': item.to_dict()
         }), 201
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create inventory item', 'details': str(e)}), 500
 
 @inventory_bp.route('/<item_id>', methods=['PUT'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def update_inventory_item(item_id):
     """Update inventory item"""
     try:
@@ -185,7 +208,7 @@ def update_inventory_item(item_id):
             return jsonify({'error': 'Inventory item not found'}), 404
         
         data = request.get_json()
-        old_values = item.to_dict()
+        old_values = model_snapshot(item)
         
         # Update allowed fields
         if 'product_name' in data:
@@ -228,7 +251,10 @@ def update_inventory_item(item_id):
             item.dimensions = data['dimensions']
         
         if 'barcode' in data:
-            item.barcode = data['barcode']
+            barcode = data['barcode'] or None
+            if barcode and barcode != item.barcode and Inventory.query.filter_by(barcode=barcode).first():
+                return jsonify({'error': 'Barcode already exists'}), 400
+            item.barcode = barcode
         
         if 'supplier_name' in data:
             item.supplier_name = data['supplier_name']
@@ -250,33 +276,33 @@ def update_inventory_item(item_id):
         
         item.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='inventory',
             record_id=item.id,
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=item.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(item)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('inventory')
+        inventory_search.record_changed(item)
+        invalidate_inventory_lookup(item, old_barcode=old_values.get('barcode'))
         
         return jsonify({
             'message': 'Inventory item updated successfully',
             'item': item.to_dict()
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update inventory item', 'details': str(e)}), 500
 
 @inventory_bp.route('/<item_id>/adjust-stock', methods=['POST'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def adjust_stock(item_id):
     """Adjust inventory stock"""
     try:
@@ -299,12 +325,12 @@ def adjust_stock(item_id):
         
         old_quantity = item.quantity_in_stock
         
+        # Relative adjustments are applied in SQL so concurrent order reservations are not lost
         if adjustment_type == 'add':
-            item.quantity_in_stock += quantity
+            return_stock(item.id, quantity)
         elif adjustment_type == 'subtract':
-            if item.quantity_in_stock < quantity:
+            if not take_stock(item.id, quantity):
                 return jsonify({'error': 'Insufficient stock for subtraction'}), 400
-            item.quantity_in_stock -= quantity
         elif adjustment_type == 'set':
             item.quantity_in_stock = quantity
         
@@ -313,22 +339,23 @@ def adjust_stock(item_id):
             item.last_restocked_date = datetime.utcnow().date()
         
         item.updated_at = datetime.utcnow()
+        db.session.flush()
+        db.session.refresh(item)
+        
+        db.session.commit()
         
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='inventory',
             record_id=item.id,
             operation='STOCK_ADJUSTMENT',
             user_id=current_user_id,
             old_values={'quantity_in_stock': float(old_quantity)},
             new_values={'quantity_in_stock': float(item.quantity_in_stock)},
-            description=f'Stock {adjustment_type}: {quantity}. Reason: {reason}',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            description=f'Stock {adjustment_type}: {quantity}. Reason: {reason}'
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('inventory')
+        invalidate_inventory_lookup(item)
         
         return jsonify({
             'message': 'Stock adjusted successfully',
@@ -336,14 +363,14 @@ def adjust_stock(item_id):
             'old_quantity': float(old_quantity),
             'new_quantity': float(item.quantity_in_stock)
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to adjust stock', 'details': str(e)}), 500
 
 @inventory_bp.route('/low-stock', methods=['GET'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def get_low_stock_items():
     """Get items with low stock"""
     try:
@@ -358,13 +385,13 @@ def get_low_stock_items():
             'low_stock_items': low_stock_items,
             'count': len(low_stock_items)
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get low stock items', 'details': str(e)}), 500
 
 @inventory_bp.route('/categories', methods=['GET'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def get_categories():
     """Get all product categories"""
     try:
@@ -376,13 +403,13 @@ def get_categories():
         category_list = [cat[0] for cat in categories if cat[0]]
         
         return jsonify({'categories': sorted(category_list)}), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get categories', 'details': str(e)}), 500
 
 @inventory_bp.route('/brands', methods=['GET'])
 @jwt_required()
-@require_inventory_access()
+@require_permission('inventory')
 def get_brands():
     """Get all product brands"""
     try:
@@ -394,7 +421,7 @@ def get_brands():
         brand_list = [brand[0] for brand in brands if brand[0]]
         
         return jsonify({'brands': sorted(brand_list)}), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get brands', 'details': str(e)}), 500
 
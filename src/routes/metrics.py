@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+
+from src.services.db_pool import pool_metrics
+from src.services.query_stats import query_stats
+from src.services.rbac import require_permission
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+@require_permission('admin')
+def get_db_pool_metrics():
+    """Get connection pool counters for this worker process"""
+    try:
+        return jsonify(pool_metrics.stats()), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to get pool metrics', 'details': str(e)}), 500
+
+@metrics_bp.route('/queries', methods=['GET'])
+@jwt_required()
+@require_permission('admin')
+def get_query_metrics():
+    """Get per-endpoint SQL query counts and timings for this worker process"""
+    try:
+        return jsonify({
+            'slow_query_ms': query_stats.slow_query_ms,
+            'endpoints': query_stats.stats()
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to get query metrics', 'details': str(e)}), 500
@@ -1,89 +1,180 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, date
 from decimal import Decimal
+import csv
+import io
+import json
+import uuid
+from sqlalchemy import insert
 
 from src.models.user import db, Customer, Employee
 from src.models.payroll import Order, OrderItem
-from src.models.inventory import AuditLog, Inventory
+from src.models.inventory import Inventory, StockReservation
+from src.services.audit import build_audit_event, log_audit_event, log_audit_events, model_snapshot
+from src.services.serializers import order_eager_options, serialize_orders
+from src.services.sales_rollup import snapshot_order, record_order_created, record_orders_created, record_order_changed
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.stock_reservation import InsufficientStockError, RESERVATION_TTL, reserve_order_stock, take_stock_for_demand, get_stock_demand
+from src.services.stock_reservation import confirm_order_reservations, release_order_reservations, expire_stale_reservations
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.rbac import require_permission, has_permission
 
 orders_bp = Blueprint('orders', __name__)
 
-def require_sales_access():
-    """Decorator to require sales access"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'sales_manager', 'sales_rep', 'logistics_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
+# Orders fetched and serialized per round trip when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Bulk order creation limits
+MAX_BULK_ORDERS = 5000
+BULK_INSERT_CHUNK_SIZE = 1000
+
+BULK_ORDER_COLUMNS = [
+    'order_number', 'customer_id', 'sales_rep_id', 'order_date', 'expected_delivery_date',
+    'subtotal', 'tax_rate', 'tax_amount', 'discount_amount', 'shipping_cost', 'total',
+    'status', 'payment_status', 'shipping_address', 'notes', 'internal_notes', 'priority',
+    'created_at', 'updated_at'
+]
+
+BULK_ORDER_ITEM_COLUMNS = [
+    'product_id', 'product_name', 'product_description', 'product_sku', 'quantity',
+    'unit_price', 'discount_percent', 'discount_amount', 'subtotal', 'notes', 'created_at'
+]
+
+EXPORT_FIELDS = [
+    'id', 'order_number', 'customer_id', 'customer_name', 'sales_rep_id', 'sales_rep_name',
+    'order_date', 'expected_delivery_date', 'actual_delivery_date', 'subtotal', 'tax_rate',
+    'tax_amount', 'discount_amount', 'shipping_cost', 'total', 'status', 'payment_status',
+    'shipping_address', 'tracking_number', 'notes', 'internal_notes', 'priority',
+    'items_count', 'created_at', 'updated_at'
+]
+
+def build_orders_query(args):
+    """Build the filtered orders query shared by the list and export endpoints"""
+    status = args.get('status')
+    customer_id = args.get('customer_id')
+    sales_rep_id = args.get('sales_rep_id')
+    priority = args.get('priority')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    search = args.get('search', '').strip()
+    
+    query = Order.query.options(*order_eager_options())
+    
+    # Apply filters
+    if status:
+        query = query.filter(Order.status == status)
+    
+    if customer_id:
+        query = query.filter(Order.customer_id == customer_id)
+    
+    if sales_rep_id:
+        query = query.filter(Order.sales_rep_id == sales_rep_id)
+    
+    if priority:
+        query = query.filter(Order.priority == priority)
+    
+    if start_date:
+        query = query.filter(Order.order_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+    
+    if end_date:
+        query = query.filter(Order.order_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    
+    if search:
+        query = query.filter(Order.order_number.contains(search))
+    
+    return query
 
 @orders_bp.route('/', methods=['GET'])
 @jwt_required()
-@require_sales_access()
+@require_permission('orders')
 def get_orders():
     """Get all orders with pagination and filtering"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        status = request.args.get('status')
-        customer_id = request.args.get('customer_id')
-        sales_rep_id = request.args.get('sales_rep_id')
-        priority = request.args.get('priority')
-        search = request.args.get('search', '').strip()
-        
-        query = Order.query
-        
-        # Apply filters
-        if status:
-            query = query.filter(Order.status == status)
-        
-        if customer_id:
-            query = query.filter(Order.customer_id == customer_id)
         
-        if sales_rep_id:
-            query = query.filter(Order.sales_rep_id == sales_rep_id)
-        
-        if priority:
-            query = query.filter(Order.priority == priority)
-        
-        if search:
-            query = query.filter(Order.order_number.contains(search))
+        query = build_orders_query(request.args)
         
         # Order by creation date
         query = query.order_by(Order.created_at.desc())
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, Order, page, per_page, request.args.get('cursor'))
         
-        orders = [order.to_dict() for order in pagination.items]
+        orders = serialize_orders(items)
         
         return jsonify({
             'orders': orders,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
-        
+    
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get orders', 'details': str(e)}), 500
 
+@orders_bp.route('/export', methods=['GET'])
+@jwt_required()
+@require_permission('orders')
+def export_orders():
+    """Stream filtered orders as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return jsonify({'error': 'Invalid export format'}), 400
+    
+    try:
+        query = build_orders_query(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    
+    # Keyset batches: each batch is fully read before its item counts are queried,
+    # so no result set is left open on the connection (PyMySQL cursors are unbuffered)
+    query = query.order_by(Order.id)
+
+    def format_batch(orders):
+        rows = serialize_orders(orders)
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            writer.writerows(rows)
+            return buffer.getvalue()
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+    def generate():
+        if export_format == 'csv':
+            yield ','.join(EXPORT_FIELDS) + '\r\n'
+        
+        last_id = None
+        while True:
+            batch_query = query if last_id is None else query.filter(Order.id > last_id)
+            batch = batch_query.limit(EXPORT_BATCH_SIZE).all()
+            if not batch:
+                break
+            
+            last_id = batch[-1].id
+            yield format_batch(batch)
+            # Serialized rows are not needed again; keep the identity map from growing
+            db.session.expunge_all()
+            if len(batch) < EXPORT_BATCH_SIZE:
+                break
+    
+    filename = f"orders-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_CONTENT_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
-@require_sales_access()
+@require_permission('orders')
 def get_order(order_id):
     """Get specific order by ID"""
     try:
@@ -98,13 +189,13 @@ def get_order(order_id):
         order_data['items'] = [item.to_dict() for item in order_items]
         
         return jsonify(order_data), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get order', 'details': str(e)}), 500
 
 @orders_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_sales_access()
+@require_permission('orders')
 def create_order():
     """Create new order"""
     try:
@@ -149,19 +240,15 @@ def create_order():
         db.session.flush()  # Get order ID
         
         # Add order items
+        products = {}
+        order_items = []
         for item_data in data['items']:
             # Validate product
             product = Inventory.query.get(item_data['product_id'])
             if not product:
                 db.session.rollback()
                 return jsonify({'error': f'Product {item_data["product_id"]} not found'}), 404
-            
-            # Check stock availability
-            if product.quantity_in_stock < item_data['quantity']:
-                db.session.rollback()
-                return jsonify({
-                    'error': f'Insufficient stock for {product.product_name}. Available: {product.quantity_in_stock}, Requested: {item_data["quantity"]}'
-                }), 400
+            products[product.id] = product
             
             order_item = OrderItem(
                 order_id=order.id,
@@ -176,36 +263,272 @@ def create_order():
             )
             order_item.calculate_subtotal()
             db.session.add(order_item)
+            order_items.append(order_item)
+        
+        # Reserve stock with conditional decrements; fails if any product ran out
+        try:
+            reserve_order_stock(order, order_items)
+        except InsufficientStockError as e:
+            db.session.rollback()
+            product = products[e.product_id]
+            return jsonify({
+                'error': f'Insufficient stock for {product.product_name}. Available: {product.quantity_in_stock}, Requested: {e.requested}'
+            }), 400
         
         # Calculate order totals
         order.calculate_totals()
         
+        # Keep the daily sales rollup in step with the new order
+        record_order_created(order)
+        
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='orders',
             record_id=str(order.id),
             operation='INSERT',
             user_id=current_user_id,
-            new_values=order.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(order)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('orders')
+        invalidate_dashboards('inventory')
         
         return jsonify({
             'message': 'Order created successfully',
             'order': order.to_dict()
         }), 201
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create order', 'details': str(e)}), 500
 
+@orders_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@require_permission('orders')
+def create_orders_bulk():
+    """Create many orders in a single transaction"""
+    try:
+        current_user_id = get_jwt_identity()
+        claims = get_jwt()
+        employee_id = claims.get('employee_id')
+        
+        data = request.get_json() or {}
+        orders_data = data.get('orders')
+        
+        if not orders_data:
+            return jsonify({'error': 'Orders are required'}), 400
+        
+        if len(orders_data) > MAX_BULK_ORDERS:
+            return jsonify({'error': f'At most {MAX_BULK_ORDERS} orders can be created per request'}), 400
+        
+        # Validate request shape before touching the database
+        errors = []
+        for index, order_data in enumerate(orders_data):
+            if not order_data.get('customer_id'):
+                errors.append({'index': index, 'error': 'Customer ID is required'})
+            elif not order_data.get('items'):
+                errors.append({'index': index, 'error': 'Order items are required'})
+            else:
+                for item_data in order_data['items']:
+                    try:
+                        quantity = Decimal(str(item_data['quantity']))
+                    except (KeyError, ArithmeticError, ValueError):
+                        quantity = None
+                    if not item_data.get('product_id') or quantity is None or quantity <= 0:
+                        errors.append({'index': index, 'error': 'Each item needs a product_id and a positive quantity'})
+                        break
+        
+        if errors:
+            return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+        
+        customer_ids = {order_data['customer_id'] for order_data in orders_data}
+        product_ids = {item_data['product_id'] for order_data in orders_data for item_data in order_data['items']}
+        
+        # One IN query per entity
+        existing_customers = {
+            customer_id for (customer_id,) in
+            db.session.query(Customer.id).filter(Customer.id.in_(customer_ids))
+        }
+        products = {
+            product.id: product for product in
+            Inventory.query.filter(Inventory.id.in_(product_ids)).all()
+        }
+        
+        # Validate customers, products and total demand per product
+        demand = {}
+        for index, order_data in enumerate(orders_data):
+            if order_data['customer_id'] not in existing_customers:
+                errors.append({'index': index, 'error': f'Customer {order_data["customer_id"]} not found'})
+            
+            for item_data in order_data['items']:
+                product = products.get(item_data['product_id'])
+                if not product:
+                    errors.append({'index': index, 'error': f'Product {item_data["product_id"]} not found'})
+                    continue
+                demand[product.id] = demand.get(product.id, 0) + Decimal(str(item_data['quantity']))
+        
+        for product_id, quantity in demand.items():
+            product = products[product_id]
+            if product.quantity_in_stock < quantity:
+                errors.append({
+                    'product_id': product_id,
+                    'error': f'Insufficient stock for {product.product_name}. Available: {product.quantity_in_stock}, Requested: {quantity}'
+                })
+        
+        if errors:
+            db.session.rollback()
+            return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+        
+        # Build order and item rows; transient models reuse the totals logic
+        now = datetime.utcnow()
+        orders = []
+        order_items = {}
+        order_numbers = set()
+        
+        for order_data in orders_data:
+            order_number = f"ORD-{now.strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            while order_number in order_numbers:
+                order_number = f"ORD-{now.strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            order_numbers.add(order_number)
+            
+            order = Order(
+                order_number=order_number,
+                customer_id=order_data['customer_id'],
+                sales_rep_id=employee_id,
+                order_date=datetime.strptime(order_data['order_date'], '%Y-%m-%d').date() if order_data.get('order_date') else now.date(),
+                expected_delivery_date=datetime.strptime(order_data['expected_delivery_date'], '%Y-%m-%d').date() if order_data.get('expected_delivery_date') else None,
+                tax_rate=Decimal(str(order_data.get('tax_rate', 0))),
+                discount_amount=Decimal(str(order_data.get('discount_amount', 0))),
+                shipping_cost=Decimal(str(order_data.get('shipping_cost', 0))),
+                status='pending',
+                payment_status='pending',
+                shipping_address=order_data.get('shipping_address'),
+                notes=order_data.get('notes'),
+                internal_notes=order_data.get('internal_notes'),
+                priority=order_data.get('priority', 'normal'),
+                created_at=now,
+                updated_at=now
+            )
+            
+            items = []
+            for item_data in order_data['items']:
+                product = products[item_data['product_id']]
+                order_item = OrderItem(
+                    product_id=product.id,
+                    product_name=product.product_name,
+                    product_description=product.description,
+                    product_sku=product.product_code,
+                    quantity=Decimal(str(item_data['quantity'])),
+                    unit_price=Decimal(str(item_data.get('unit_price', product.selling_price))),
+                    discount_percent=Decimal(str(item_data.get('discount_percent', 0))),
+                    notes=item_data.get('notes'),
+                    created_at=now
+                )
+                order_item.calculate_subtotal()
+                items.append(order_item)
+            
+            order.calculate_totals(items)
+            orders.append(order)
+            order_items[order_number] = items
+        
+        # Take stock with conditional decrements; the snapshot check above can race
+        try:
+            take_stock_for_demand(demand)
+        except InsufficientStockError as e:
+            db.session.rollback()
+            return jsonify({'error': 'Validation failed', 'errors': [{
+                'product_id': e.product_id,
+                'error': f'Insufficient stock for {products[e.product_id].product_name}. Requested: {e.requested}'
+            }]}), 400
+        
+        # Bulk insert orders, then resolve their generated ids by order number
+        db.session.execute(insert(Order), [
+            {column: getattr(order, column) for column in BULK_ORDER_COLUMNS}
+            for order in orders
+        ])
+        
+        order_ids = {}
+        numbers = list(order_numbers)
+        for start in range(0, len(numbers), BULK_INSERT_CHUNK_SIZE):
+            order_ids.update(
+                (order_number, order_id) for order_id, order_number in
+                db.session.query(Order.id, Order.order_number).filter(
+                    Order.order_number.in_(numbers[start:start + BULK_INSERT_CHUNK_SIZE])
+                )
+            )
+        
+        item_rows = []
+        reservation_rows = []
+        audit_events = []
+        for order in orders:
+            order.id = order_ids[order.order_number]
+            for order_item in order_items[order.order_number]:
+                row = {column: getattr(order_item, column) for column in BULK_ORDER_ITEM_COLUMNS}
+                row['order_id'] = order.id
+                item_rows.append(row)
+            
+            order_demand = get_stock_demand(
+                (order_item.product_id, order_item.quantity) for order_item in order_items[order.order_number]
+            )
+            for product_id, quantity in order_demand.items():
+                reservation_rows.append({
+                    'product_id': product_id,
+                    'order_id': order.id,
+                    'quantity': quantity,
+                    'status': 'held',
+                    'expires_at': now + RESERVATION_TTL,
+                    'created_at': now,
+                    'updated_at': now
+                })
+            
+            audit_events.append(build_audit_event(
+                table_name='orders',
+                record_id=order.id,
+                operation='INSERT',
+                user_id=current_user_id,
+                new_values={
+                    'order_number': order.order_number,
+                    'customer_id': order.customer_id,
+                    'items_count': len(order_items[order.order_number]),
+                    'total': float(order.total)
+                },
+                description='Bulk order import'
+            ))
+        
+        db.session.execute(insert(OrderItem), item_rows)
+        db.session.execute(insert(StockReservation), reservation_rows)
+        
+        # Keep the daily sales rollup in step, one update per bucket
+        record_orders_created(orders)
+        
+        db.session.commit()
+        
+        # Log audit
+        log_audit_events(audit_events)
+        invalidate_dashboards('orders')
+        invalidate_dashboards('inventory')
+        
+        return jsonify({
+            'message': f'{len(orders)} orders created successfully',
+            'count': len(orders),
+            'orders': [
+                {
+                    'id': order.id,
+                    'order_number': order.order_number,
+                    'customer_id': order.customer_id,
+                    'total': float(order.total)
+                } for order in orders
+            ]
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create orders', 'details': str(e)}), 500
+
 @orders_bp.route('/<int:order_id>', methods=['PUT'])
 @jwt_required()
-@require_sales_access()
+@require_permission('orders')
 def update_order(order_id):
     """Update order"""
     try:
@@ -220,7 +543,8 @@ def update_order(order_id):
             return jsonify({'error': 'Cannot modify order in current status'}), 400
         
         data = request.get_json()
-        old_values = order.to_dict()
+        old_values = model_snapshot(order)
+        rollup_before = snapshot_order(order)
         
         # Update allowed fields
         if 'expected_delivery_date' in data:
@@ -261,34 +585,42 @@ def update_order(order_id):
             order.actual_delivery_date = datetime.utcnow().date()
         
         order.updated_at = datetime.utcnow()
+        record_order_changed(rollup_before, order)
+        
+        # Confirmed orders keep their stock; cancelled ones give it back
+        stock_released = False
+        if order.status == 'cancelled':
+            stock_released = release_order_reservations(order.id) > 0
+        elif order.status != 'pending':
+            confirm_order_reservations(order.id)
+        
+        db.session.commit()
         
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='orders',
             record_id=str(order.id),
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=order.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(order)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('orders')
+        if stock_released:
+            invalidate_dashboards('inventory')
         
         return jsonify({
             'message': 'Order updated successfully',
             'order': order.to_dict()
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update order', 'details': str(e)}), 500
 
 @orders_bp.route('/<int:order_id>/cancel', methods=['POST'])
 @jwt_required()
-@require_sales_access()
+@require_permission('orders')
 def cancel_order(order_id):
     """Cancel order"""
     try:
@@ -304,42 +636,64 @@ def cancel_order(order_id):
         data = request.get_json()
         cancellation_reason = data.get('reason', '')
         
-        old_values = order.to_dict()
+        old_values = model_snapshot(order)
+        rollup_before = snapshot_order(order)
         
         order.status = 'cancelled'
         order.internal_notes = f"{order.internal_notes or ''}\nCancelled: {cancellation_reason}".strip()
         order.updated_at = datetime.utcnow()
+        record_order_changed(rollup_before, order)
         
-        # Restore inventory for cancelled orders
-        for item in order.order_items:
-            if item.product:
-                item.product.quantity_in_stock += item.quantity
+        # Return reserved stock; orders placed before reservations existed never took any
+        release_order_reservations(order.id)
+        
+        db.session.commit()
         
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='orders',
             record_id=str(order.id),
             operation='CANCEL',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=order.to_dict(),
-            description=f'Order cancelled: {cancellation_reason}',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(order),
+            description=f'Order cancelled: {cancellation_reason}'
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('orders')
+        invalidate_dashboards('inventory')
         
         return jsonify({
             'message': 'Order cancelled successfully',
             'order': order.to_dict()
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to cancel order', 'details': str(e)}), 500
 
+@orders_bp.route('/reservations/expire', methods=['POST'])
+@jwt_required()
+def expire_reservations():
+    """Cancel pending orders whose stock reservations have expired"""
+    try:
+        claims = get_jwt()
+        if not has_permission(claims.get('role'), 'admin'):
+            return jsonify({'error': 'Insufficient permissions'}), 403
+        
+        expired = expire_stale_reservations()
+        if expired:
+            invalidate_dashboards('orders')
+            invalidate_dashboards('inventory')
+        
+        return jsonify({
+            'message': 'Expired reservations released',
+            'expired_orders': expired
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to expire reservations', 'details': str(e)}), 500
+
 @orders_bp.route('/my-orders', methods=['GET'])
 @jwt_required()
 def get_my_orders():
@@ -349,7 +703,7 @@ def get_my_orders():
         employee_id = claims.get('employee_id')
         user_role = claims.get('role')
         
-        if user_role not in ['sales_rep', 'sales_manager']:
+        if not has_permission(user_role, 'my_orders'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         if not employee_id:
@@ -359,7 +713,7 @@ def get_my_orders():
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         status = request.args.get('status')
         
-        query = Order.query.filter_by(sales_rep_id=employee_id)
+        query = Order.query.options(*order_eager_options()).filter_by(sales_rep_id=employee_id)
         
         if status:
             query = query.filter(Order.status == status)
@@ -370,7 +724,7 @@ def get_my_orders():
             error_out=False
         )
         
-        orders = [order.to_dict() for order in pagination.items]
+        orders = serialize_orders(pagination.items)
         
         return jsonify({
             'orders': orders,
@@ -383,7 +737,7 @@ def get_my_orders():
                 'has_prev': pagination.has_prev
             }
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': 'Failed to get orders', 'details': str(e)}), 500
 
@@ -5,26 +5,16 @@ from decimal import Decimal
 
 from src.models.user import db, Employee
 from src.models.payroll import Payroll, Reward
-from src.models.inventory import AuditLog
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.rbac import require_permission
 
 payroll_bp = Blueprint('payroll', __name__)
 
-def require_payroll_access():
-    """Decorator to require payroll access"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'hr_manager', 'finance_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @payroll_bp.route('/', methods=['GET'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def get_payroll_records():
     """Get all payroll records with pagination and filtering"""
     try:
@@ -58,33 +48,24 @@ def get_payroll_records():
         # Order by payment date
         query = query.order_by(Payroll.payment_date.desc())
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, Payroll, page, per_page, request.args.get('cursor'))
         
-        payroll_records = [record.to_dict() for record in pagination.items]
+        payroll_records = [record.to_dict() for record in items]
         
         return jsonify({
             'payroll_records': payroll_records,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
         
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get payroll records', 'details': str(e)}), 500
 
 @payroll_bp.route('/<payroll_id>', methods=['GET'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def get_payroll_record(payroll_id):
     """Get specific payroll record by ID"""
     try:
@@ -99,7 +80,7 @@ def get_payroll_record(payroll_id):
 
 @payroll_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def create_payroll_record():
     """Create new payroll record"""
     try:
@@ -151,19 +132,17 @@ def create_payroll_record():
         db.session.add(payroll)
         db.session.flush()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='payroll',
             record_id=payroll.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=payroll.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(payroll)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('payroll', employee_id=payroll.employee_id)
         
         return jsonify({
             'message': 'Payroll record created successfully',
@@ -176,7 +155,7 @@ def create_payroll_record():
 
 @payroll_bp.route('/<payroll_id>', methods=['PUT'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def update_payroll_record(payroll_id):
     """Update payroll record"""
     try:
@@ -190,7 +169,7 @@ def update_payroll_record(payroll_id):
             return jsonify({'error': 'Cannot modify paid payroll record'}), 400
         
         data = request.get_json()
-        old_values = payroll.to_dict()
+        old_values = model_snapshot(payroll)
         
         # Update allowed fields
         if 'base_salary' in data:
@@ -230,20 +209,18 @@ def update_payroll_record(payroll_id):
         payroll.calculate_totals()
         payroll.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='payroll',
             record_id=payroll.id,
             operation='UPDATE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=payroll.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(payroll)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('payroll', employee_id=payroll.employee_id)
         
         return jsonify({
             'message': 'Payroll record updated successfully',
@@ -256,7 +233,7 @@ def update_payroll_record(payroll_id):
 
 @payroll_bp.route('/<payroll_id>/approve', methods=['POST'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def approve_payroll(payroll_id):
     """Approve payroll record"""
     try:
@@ -269,28 +246,26 @@ def approve_payroll(payroll_id):
         if payroll.status != 'pending':
             return jsonify({'error': 'Payroll record is not in pending status'}), 400
         
-        old_values = payroll.to_dict()
+        old_values = model_snapshot(payroll)
         
         payroll.status = 'paid'
         payroll.approved_by = current_user_id
         payroll.payment_date = datetime.utcnow()
         payroll.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='payroll',
             record_id=payroll.id,
             operation='APPROVE',
             user_id=current_user_id,
             old_values=old_values,
-            new_values=payroll.to_dict(),
-            description='Payroll approved and marked as paid',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(payroll),
+            description='Payroll approved and marked as paid'
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('payroll', employee_id=payroll.employee_id)
         
         return jsonify({
             'message': 'Payroll approved successfully',
@@ -303,7 +278,7 @@ def approve_payroll(payroll_id):
 
 @payroll_bp.route('/rewards', methods=['GET'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def get_rewards():
     """Get all rewards with pagination and filtering"""
     try:
@@ -354,7 +329,7 @@ def get_rewards():
 
 @payroll_bp.route('/rewards', methods=['POST'])
 @jwt_required()
-@require_payroll_access()
+@require_permission('payroll')
 def create_reward():
     """Create new reward"""
     try:
@@ -391,19 +366,17 @@ def create_reward():
         if reward.points_awarded > 0:
             employee.reward_points += reward.points_awarded
         
+        db.session.commit()
+        
         # Log audit
-        audit_log = AuditLog(
+        log_audit_event(
             table_name='rewards',
             record_id=reward.id,
             operation='INSERT',
             user_id=current_user_id,
-            new_values=reward.to_dict(),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
+            new_values=model_snapshot(reward)
         )
-        db.session.add(audit_log)
-        
-        db.session.commit()
+        invalidate_dashboards('payroll', employee_id=reward.employee_id)
         
         return jsonify({
             'message': 'Reward created successfully',
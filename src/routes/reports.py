@@ -2,29 +2,19 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, date, timedelta
 from sqlalchemy import func, extract
+from sqlalchemy.orm import joinedload
 
 from src.models.user import db, Employee, Customer, Department
-from src.models.payroll import Order, Payroll, Reward
+from src.models.payroll import Order, Payroll, Reward, DailySalesRollup
 from src.models.inventory import Inventory, Invoice, Expense
+from src.services.sales_rollup import rollup_query, get_sales_totals
+from src.services.rbac import require_permission, has_permission
 
 reports_bp = Blueprint('reports', __name__)
 
-def require_manager_access():
-    """Decorator to require manager access"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if not user_role.endswith('_manager') and user_role != 'admin':
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
 @reports_bp.route('/sales-summary', methods=['GET'])
 @jwt_required()
-@require_manager_access()
+@require_permission('reports')
 def get_sales_summary():
     """Get sales summary report"""
     try:
@@ -40,53 +30,45 @@ def get_sales_summary():
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # Get orders in date range
-        orders_query = Order.query.filter(
-            Order.order_date >= start_date,
-            Order.order_date <= end_date
-        )
-        
-        # Total sales
-        total_sales = orders_query.with_entities(func.sum(Order.total)).scalar() or 0
-        
-        # Total orders
-        total_orders = orders_query.count()
+        # Totals come from the daily sales rollup rather than scanning orders
+        total_orders, total_sales = get_sales_totals(start_date=start_date, end_date=end_date)
         
         # Average order value
         avg_order_value = total_sales / total_orders if total_orders > 0 else 0
         
         # Sales by status
-        sales_by_status = db.session.query(
-            Order.status,
-            func.count(Order.id).label('count'),
-            func.sum(Order.total).label('total')
-        ).filter(
-            Order.order_date >= start_date,
-            Order.order_date <= end_date
-        ).group_by(Order.status).all()
+        sales_by_status = rollup_query(
+            DailySalesRollup.status,
+            func.sum(DailySalesRollup.order_count).label('count'),
+            func.sum(DailySalesRollup.total_sales).label('total'),
+            start_date=start_date,
+            end_date=end_date
+        ).group_by(DailySalesRollup.status).all()
         
         # Top customers
-        top_customers = db.session.query(
+        top_customers = rollup_query(
             Customer.name,
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.total).label('total_value')
-        ).join(Order).filter(
-            Order.order_date >= start_date,
-            Order.order_date <= end_date
+            func.sum(DailySalesRollup.order_count).label('order_count'),
+            func.sum(DailySalesRollup.total_sales).label('total_value'),
+            start_date=start_date,
+            end_date=end_date
+        ).join(
+            Customer, Customer.id == DailySalesRollup.customer_id
         ).group_by(Customer.id, Customer.name).order_by(
-            func.sum(Order.total).desc()
+            func.sum(DailySalesRollup.total_sales).desc()
         ).limit(10).all()
         
         # Sales by sales rep
-        sales_by_rep = db.session.query(
+        sales_by_rep = rollup_query(
             Employee.full_name,
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.total).label('total_value')
-        ).join(Order, Employee.id == Order.sales_rep_id).filter(
-            Order.order_date >= start_date,
-            Order.order_date <= end_date
+            func.sum(DailySalesRollup.order_count).label('order_count'),
+            func.sum(DailySalesRollup.total_sales).label('total_value'),
+            start_date=start_date,
+            end_date=end_date
+        ).join(
+            Employee, Employee.id == DailySalesRollup.sales_rep_id
         ).group_by(Employee.id, Employee.full_name).order_by(
-            func.sum(Order.total).desc()
+            func.sum(DailySalesRollup.total_sales).desc()
         ).all()
         
         return jsonify({
@@ -102,21 +84,21 @@ def get_sales_summary():
             'sales_by_status': [
                 {
                     'status': status,
-                    'count': count,
+                    'count': int(count),
                     'total': float(total)
                 } for status, count, total in sales_by_status
             ],
             'top_customers': [
                 {
                     'name': name,
-                    'order_count': order_count,
+                    'order_count': int(order_count),
                     'total_value': float(total_value)
                 } for name, order_count, total_value in top_customers
             ],
             'sales_by_rep': [
                 {
                     'name': name,
-                    'order_count': order_count,
+                    'order_count': int(order_count),
                     'total_value': float(total_value)
                 } for name, order_count, total_value in sales_by_rep
             ]
@@ -127,7 +109,7 @@ def get_sales_summary():
 
 @reports_bp.route('/inventory-report', methods=['GET'])
 @jwt_required()
-@require_manager_access()
+@require_permission('reports')
 def get_inventory_report():
     """Get inventory report"""
     try:
@@ -209,7 +191,7 @@ def get_payroll_summary():
         user_role = claims.get('role')
         
         # Only HR, Finance managers and Admin can access full payroll data
-        if user_role not in ['admin', 'hr_manager', 'finance_manager']:
+        if not has_permission(user_role, 'payroll'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         month = request.args.get('month')
@@ -290,7 +272,7 @@ def get_financial_summary():
         user_role = claims.get('role')
         
         # Only Finance managers and Admin can access financial data
-        if user_role not in ['admin', 'finance_manager']:
+        if not has_permission(user_role, 'finance'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         start_date = request.args.get('start_date')
@@ -305,14 +287,12 @@ def get_financial_summary():
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # Revenue (from orders)
-        total_revenue = db.session.query(
-            func.sum(Order.total)
-        ).filter(
-            Order.order_date >= start_date,
-            Order.order_date <= end_date,
-            Order.status.in_(['delivered', 'shipped'])
-        ).scalar() or 0
+        # Revenue (from the daily sales rollup)
+        _, total_revenue = get_sales_totals(
+            start_date=start_date,
+            end_date=end_date,
+            statuses=['delivered', 'shipped']
+        )
         
         # Expenses
         total_expenses = db.session.query(
@@ -371,13 +351,17 @@ def get_financial_summary():
 
 @reports_bp.route('/employee-performance', methods=['GET'])
 @jwt_required()
-@require_manager_access()
+@require_permission('reports')
 def get_employee_performance():
     """Get employee performance report"""
     try:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         department_id = request.args.get('department_id')
+        page = request.args.get('page', type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        sort_by = request.args.get('sort_by', 'sales_value')
+        sort_order = request.args.get('sort_order', 'desc')
         
         # Default to current month if no dates provided
         if not start_date or not end_date:
@@ -388,53 +372,100 @@ def get_employee_performance():
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # Base query for employees
-        employee_query = Employee.query.filter(Employee.is_active == True)
+        # Sales performance per sales rep in one grouped query
+        sales_stats = db.session.query(
+            Order.sales_rep_id.label('employee_id'),
+            func.count(Order.id).label('sales_count'),
+            func.sum(Order.total).label('sales_value')
+        ).filter(
+            Order.order_date >= start_date,
+            Order.order_date <= end_date
+        ).group_by(Order.sales_rep_id).subquery()
+        
+        # Rewards received per employee in one grouped query
+        reward_stats = db.session.query(
+            Reward.employee_id.label('employee_id'),
+            func.count(Reward.id).label('rewards_count')
+        ).filter(
+            Reward.reward_date >= start_date,
+            Reward.reward_date <= end_date
+        ).group_by(Reward.employee_id).subquery()
+        
+        sales_count = func.coalesce(sales_stats.c.sales_count, 0)
+        sales_value = func.coalesce(sales_stats.c.sales_value, 0)
+        rewards_count = func.coalesce(reward_stats.c.rewards_count, 0)
+        
+        query = db.session.query(
+            Employee,
+            sales_count.label('sales_count'),
+            sales_value.label('sales_value'),
+            rewards_count.label('rewards_count')
+        ).outerjoin(
+            sales_stats, sales_stats.c.employee_id == Employee.id
+        ).outerjoin(
+            reward_stats, reward_stats.c.employee_id == Employee.id
+        ).options(
+            joinedload(Employee.department),
+            joinedload(Employee.manager)
+        ).filter(Employee.is_active == True)
         
         if department_id:
-            employee_query = employee_query.filter(Employee.department_id == department_id)
-        
-        employees = employee_query.all()
-        
-        performance_data = []
-        
-        for employee in employees:
-            # Sales performance (for sales reps)
-            sales_count = Order.query.filter(
-                Order.sales_rep_id == employee.id,
-                Order.order_date >= start_date,
-                Order.order_date <= end_date
-            ).count()
-            
-            sales_value = db.session.query(
-                func.sum(Order.total)
-            ).filter(
-                Order.sales_rep_id == employee.id,
-                Order.order_date >= start_date,
-                Order.order_date <= end_date
-            ).scalar() or 0
-            
-            # Rewards received
-            rewards_count = Reward.query.filter(
-                Reward.employee_id == employee.id,
-                Reward.reward_date >= start_date,
-                Reward.reward_date <= end_date
-            ).count()
-            
-            performance_data.append({
+            query = query.filter(Employee.department_id == department_id)
+        
+        # Sort by sales value unless another metric is requested
+        sort_columns = {
+            'sales_value': sales_value,
+            'sales_count': sales_count,
+            'rewards_count': rewards_count
+        }
+        if sort_by not in sort_columns:
+            return jsonify({'error': 'Invalid sort field'}), 400
+        
+        sort_column = sort_columns[sort_by]
+        query = query.order_by(
+            sort_column.asc() if sort_order == 'asc' else sort_column.desc(),
+            Employee.id
+        )
+        
+        pagination = None
+        if page:
+            pagination = query.paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            rows = pagination.items
+        else:
+            rows = query.all()
+        
+        performance_data = [
+            {
                 'employee': employee.to_dict(),
-                'sales_count': sales_count,
-                'sales_value': float(sales_value),
-                'rewards_count': rewards_count
-            })
+                'sales_count': count,
+                'sales_value': float(value),
+                'rewards_count': rewards
+            } for employee, count, value, rewards in rows
+        ]
         
-        return jsonify({
+        response = {
             'period': {
                 'start_date': start_date.isoformat(),
                 'end_date': end_date.isoformat()
             },
             'performance_data': performance_data
-        }), 200
+        }
+        
+        if pagination:
+            response['pagination'] = {
+                'page': page,
+                'pages': pagination.pages,
+                'per_page': per_page,
+                'total': pagination.total,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get employee performance', 'details': str(e)}), 500
@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+
+from src.services.global_search import global_search, SEARCH_TYPES, SEARCH_PERMISSIONS
+from src.services.rbac import has_permission
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/', methods=['GET'])
+@jwt_required()
+def search_all():
+    """Search customers, employees, users and orders in one request"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        requested_types = request.args.get('types')
+        
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        
+        types = [search_type.strip() for search_type in requested_types.split(',')] if requested_types else SEARCH_TYPES
+        invalid_types = [search_type for search_type in types if search_type not in SEARCH_TYPES]
+        if invalid_types:
+            return jsonify({'error': f'Invalid types: {", ".join(invalid_types)}'}), 400
+        
+        # Only search entity types the caller may list
+        role = get_jwt().get('role')
+        types = [
+            search_type for search_type in types
+            if SEARCH_PERMISSIONS[search_type] is None or has_permission(role, SEARCH_PERMISSIONS[search_type])
+        ]
+        
+        return jsonify({
+            'query': query,
+            'results': global_search.search(query, types=types, limit=limit)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': 'Failed to search', 'details': str(e)}), 500
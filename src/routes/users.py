@@ -3,44 +3,27 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime
 
 from src.models.user import db, User, Employee, Department
-from src.models.inventory import AuditLog
+from src.services.audit import log_audit_event, model_snapshot
+from src.services.pagination import paginate_query, InvalidCursorError
+from src.services.rbac import require_permission, has_permission
 
 users_bp = Blueprint('users', __name__)
 
-def require_admin_or_hr():
-    """Decorator to require admin or HR manager role"""
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            user_role = claims.get('role')
-            if user_role not in ['admin', 'hr_manager']:
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
-        return wrapper
-    return decorator
-
-def log_audit(user_id, table_name, record_id, operation, old_values=None, new_values=None):
+def log_audit(user_id, table_name, record_id, operation, old_values=None, new_values=None, description=None):
     """Helper function to log audit events"""
-    try:
-        audit_log = AuditLog(
-            table_name=table_name,
-            record_id=str(record_id),
-            operation=operation,
-            user_id=user_id,
-            old_values=old_values,
-            new_values=new_values,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
-        db.session.add(audit_log)
-        db.session.commit()
-    except Exception as e:
-        print(f"Audit log error: {e}")
+    log_audit_event(
+        table_name=table_name,
+        record_id=record_id,
+        operation=operation,
+        user_id=user_id,
+        old_values=old_values,
+        new_values=new_values,
+        description=description
+    )
 
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def get_users():
     """Get all users with pagination and filtering"""
     try:
@@ -65,15 +48,11 @@ def get_users():
         # Order by creation date
         query = query.order_by(User.created_at.desc())
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginate by page number, or by (created_at, id) cursor when ?cursor= is given
+        items, pagination = paginate_query(query, User, page, per_page, request.args.get('cursor'))
         
         users = []
-        for user in pagination.items:
+        for user in items:
             user_data = user.to_dict()
             # Add employee info if exists
             employee = Employee.query.filter_by(user_id=user.id).first()
@@ -83,16 +62,11 @@ def get_users():
         
         return jsonify({
             'users': users,
-            'pagination': {
-                'page': page,
-                'pages': pagination.pages,
-                'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         }), 200
         
+    except InvalidCursorError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get users', 'details': str(e)}), 500
 
@@ -106,7 +80,7 @@ def get_user(user_id):
         user_role = claims.get('role')
         
         # Users can view their own profile, admins and HR can view any
-        if user_id != current_user_id and user_role not in ['admin', 'hr_manager']:
+        if user_id != current_user_id and not has_permission(user_role, 'hr'):
             return jsonify({'error': 'Insufficient permissions'}), 403
         
         user = User.query.get(user_id)
@@ -127,7 +101,7 @@ def get_user(user_id):
 
 @users_bp.route('/', methods=['POST'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def create_user():
     """Create new user"""
     try:
@@ -175,11 +149,11 @@ def create_user():
         db.session.add(user)
         db.session.flush()  # Get the user ID
         
-        log_audit(current_user_id, 'users', user.id, 'INSERT', 
-                 new_values=user.to_dict())
-        
         db.session.commit()
         
+        log_audit(current_user_id, 'users', user.id, 'INSERT', 
+                 new_values=model_snapshot(user))
+        
         return jsonify({
             'message': 'User created successfully',
             'user': user.to_dict()
@@ -191,7 +165,7 @@ def create_user():
 
 @users_bp.route('/<user_id>', methods=['PUT'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def update_user(user_id):
     """Update user"""
     try:
@@ -202,7 +176,7 @@ def update_user(user_id):
             return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
-        old_values = user.to_dict()
+        old_values = model_snapshot(user)
         
         # Update allowed fields
         if 'email' in data:
@@ -227,11 +201,11 @@ def update_user(user_id):
         
         user.updated_at = datetime.utcnow()
         
-        log_audit(current_user_id, 'users', user.id, 'UPDATE', 
-                 old_values=old_values, new_values=user.to_dict())
-        
         db.session.commit()
         
+        log_audit(current_user_id, 'users', user.id, 'UPDATE', 
+                 old_values=old_values, new_values=model_snapshot(user))
+        
         return jsonify({
             'message': 'User updated successfully',
             'user': user.to_dict()
@@ -243,7 +217,7 @@ def update_user(user_id):
 
 @users_bp.route('/<user_id>/reset-password', methods=['POST'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def reset_user_password(user_id):
     """Reset user password"""
     try:
@@ -269,11 +243,11 @@ def reset_user_password(user_id):
         user.failed_login_attempts = 0
         user.account_locked_until = None
         
+        db.session.commit()
+        
         log_audit(current_user_id, 'users', user.id, 'PASSWORD_RESET', 
                  description=f'Password reset for user {user.email}')
         
-        db.session.commit()
-        
         return jsonify({'message': 'Password reset successfully'}), 200
         
     except Exception as e:
@@ -282,7 +256,7 @@ def reset_user_password(user_id):
 
 @users_bp.route('/<user_id>/unlock', methods=['POST'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def unlock_user_account(user_id):
     """Unlock user account"""
     try:
@@ -296,11 +270,11 @@ def unlock_user_account(user_id):
         user.account_locked_until = None
         user.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         log_audit(current_user_id, 'users', user.id, 'ACCOUNT_UNLOCKED', 
                  description=f'Account unlocked for user {user.email}')
         
-        db.session.commit()
-        
         return jsonify({'message': 'Account unlocked successfully'}), 200
         
     except Exception as e:
@@ -309,7 +283,7 @@ def unlock_user_account(user_id):
 
 @users_bp.route('/<user_id>', methods=['DELETE'])
 @jwt_required()
-@require_admin_or_hr()
+@require_permission('hr')
 def delete_user(user_id):
     """Delete user (soft delete by deactivating)"""
     try:
@@ -323,17 +297,17 @@ def delete_user(user_id):
         if user_id == current_user_id:
             return jsonify({'error': 'Cannot delete your own account'}), 400
         
-        old_values = user.to_dict()
+        old_values = model_snapshot(user)
         
         # Soft delete by deactivating
         user.is_active = False
         user.updated_at = datetime.utcnow()
         
+        db.session.commit()
+        
         log_audit(current_user_id, 'users', user.id, 'DELETE', 
                  old_values=old_values, description=f'User {user.email} deactivated')
         
-        db.session.commit()
-        
         return jsonify({'message': 'User deactivated successfully'}), 200
         
     except Exception as e:
@@ -0,0 +1,254 @@
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import has_request_context, request
+from sqlalchemy import insert, inspect
+
+from src.models.user import db
+from src.models.inventory import AuditLog
+
+
+# Columns never copied into audit snapshots
+AUDIT_EXCLUDED_FIELDS = {'password_hash', 'password_reset_token', 'two_factor_secret'}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def model_snapshot(record):
+    """Get a record's column values as JSON-safe data without touching relationships"""
+    return {
+        column.key: _json_value(getattr(record, column.key))
+        for column in inspect(record).mapper.column_attrs
+        if column.key not in AUDIT_EXCLUDED_FIELDS
+    }
+
+def build_audit_event(table_name, record_id, operation, user_id=None, old_values=None, new_values=None,
+                      description=None, severity='info', user_email=None):
+    """Build an audit row as a plain dict, capturing request details if available
+    
+    Every event carries the same keys so batches can be inserted with executemany.
+    """
+    changed_fields = None
+    if old_values and new_values:
+        changed_fields = sorted(key for key in new_values if old_values.get(key) != new_values[key])
+    
+    return {
+        'id': str(uuid.uuid4()),
+        'table_name': table_name,
+        'record_id': str(record_id),
+        'operation': operation,
+        'old_values': old_values,
+        'new_values': new_values,
+        'changed_fields': changed_fields,
+        'user_id': user_id,
+        'user_email': user_email,
+        'ip_address': request.remote_addr if has_request_context() else None,
+        'user_agent': request.headers.get('User-Agent') if has_request_context() else None,
+        'description': description,
+        'severity': severity,
+        'timestamp': datetime.utcnow()
+    }
+
+
+class AuditWriter:
+    """Background writer that batch-inserts audit events off the request path
+    
+    Events are queued in memory and written by a worker thread every
+    flush_interval seconds or batch_size events, whichever comes first. When
+    the queue is full, enqueue blocks for up to put_timeout seconds and then
+    spills the event to a JSON lines file that replay_spill() loads later.
+    """
+
+    def __init__(self, maxsize=10000, batch_size=500, flush_interval=0.5, put_timeout=0.05, spill_path=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path or os.path.join(tempfile.gettempdir(), 'audit_spill.jsonl')
+        self.written = 0
+        self.spilled = 0
+        self.failed_batches = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._app = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._spill_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Start the worker thread for an application"""
+        if self._thread is not None:
+            return
+        
+        self._app = app
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, event):
+        """Queue an event, applying backpressure and spilling to disk when full
+        
+        Returns False when the writer is not running so the caller can write
+        synchronously instead.
+        """
+        if not self.running:
+            return False
+        
+        try:
+            self._queue.put(event, timeout=self.put_timeout)
+        except queue.Full:
+            self._spill([event])
+        return True
+
+    def flush(self):
+        """Block until every queued event has been written or spilled"""
+        if self.running:
+            self._queue.join()
+
+    def shutdown(self, timeout=5):
+        """Stop the worker after writing whatever is still queued"""
+        if self._thread is None:
+            return
+        
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        
+        # Anything the worker could not reach in time goes to the spill file
+        leftover = self._drain(self._queue.qsize())
+        if leftover:
+            self._spill(leftover)
+
+    def stats(self):
+        """Get queue depth and write counters"""
+        return {
+            'running': self.running,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'spilled': self.spilled,
+            'failed_batches': self.failed_batches
+        }
+
+    def replay_spill(self):
+        """Insert events from the spill file and truncate it
+        
+        Must be called inside an application context. Returns the number of
+        events written.
+        """
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            
+            with open(self.spill_path) as spill_file:
+                events = [json.loads(line) for line in spill_file if line.strip()]
+            
+            for event in events:
+                event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+            
+            for start in range(0, len(events), self.batch_size):
+                db.session.execute(insert(AuditLog), events[start:start + self.batch_size])
+            db.session.commit()
+            
+            open(self.spill_path, 'w').close()
+            return len(events)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _drain(self, limit):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        return events
+
+    def _write(self, batch):
+        try:
+            with self._app.app_context():
+                try:
+                    db.session.execute(insert(AuditLog), batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+            self.written += len(batch)
+        except Exception as e:
+            print(f"Audit log error: {e}")
+            self.failed_batches += 1
+            self._spill(batch)
+
+    def _spill(self, events):
+        try:
+            with self._spill_lock, open(self.spill_path, 'a') as spill_file:
+                for event in events:
+                    spill_file.write(json.dumps(event, default=str) + '\n')
+            self.spilled += len(events)
+        except OSError as e:
+            print(f"Audit spill error: {e}")
+
+
+audit_writer = AuditWriter(
+    maxsize=int(os.getenv('AUDIT_QUEUE_SIZE', '10000')),
+    batch_size=int(os.getenv('AUDIT_BATCH_SIZE', '500')),
+    flush_interval=int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', '500')) / 1000,
+    spill_path=os.getenv('AUDIT_SPILL_PATH')
+)
+
+
+def log_audit_events(events):
+    """Record built audit events in the background, or synchronously if the writer is not running
+    
+    Call after the request's own commit; the synchronous fallback commits the
+    session.
+    """
+    pending = [event for event in events if not audit_writer.enqueue(event)]
+    if not pending:
+        return
+    
+    try:
+        db.session.execute(insert(AuditLog), pending)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Audit log error: {e}")
+
+def log_audit_event(table_name, record_id, operation, **kwargs):
+    """Record a single audit event; see log_audit_events"""
+    log_audit_events([build_audit_event(table_name, record_id, operation, **kwargs)])
@@ -0,0 +1,64 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from sqlalchemy.orm import joinedload
+
+from src.models.user import db, User, Employee
+
+
+# Password hashing is CPU bound; cap how many hashes run at once and how many may wait
+PASSWORD_HASH_WORKERS = int(os.getenv('AUTH_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv('AUTH_HASH_QUEUE_LIMIT', str(PASSWORD_HASH_WORKERS * 8)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('AUTH_HASH_TIMEOUT', '10'))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE_LIMIT)
+
+
+class AuthBusyError(Exception):
+    """Raised when too many password checks are already queued or one took too long"""
+
+
+def get_user_with_employee(email=None, user_id=None):
+    """Load a user and their employee record in one joined query
+    
+    Returns (user, employee); either may be None.
+    """
+    query = db.session.query(User, Employee).outerjoin(Employee, Employee.user_id == User.id).options(
+        joinedload(Employee.department),
+        joinedload(Employee.manager)
+    )
+    
+    if email is not None:
+        query = query.filter(User.email == email)
+    else:
+        query = query.filter(User.id == user_id)
+    
+    return query.first() or (None, None)
+
+def run_password_hash(func, *args):
+    """Run a password hashing call on the bounded hash pool
+    
+    Raises AuthBusyError instead of queueing without limit, so a login storm
+    sheds load rather than tying up every web worker. The slot is held until
+    the hash actually finishes, even when the caller gives up waiting.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise AuthBusyError('Too many concurrent password checks')
+    
+    try:
+        future = _hash_executor.submit(func, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except FutureTimeoutError:
+        raise AuthBusyError('Password check timed out')
+
+def verify_password(user, password):
+    """Check a user's password on the hash pool"""
+    return run_password_hash(user.check_password, password)
@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from sqlalchemy import event
+
+from src.models.user import Customer
+from src.models.inventory import Inventory
+from src.services.search_index import normalize_text
+
+
+# Rows re-read before the last seen updated_at, for writes that committed late
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+SESSION_STALE_KEY = 'autocomplete_stale'
+
+
+class PrefixIndex:
+    """Sorted-array prefix index from normalized keys to labelled documents
+    
+    Lookups bisect into the sorted keys, so they cost O(log n) plus the
+    matches returned. Full names and codes rank above later words of a name,
+    so "ahm" finds "Ahmad Saleh" before "Mohammad Ahmad". Thread-safe; add()
+    replaces a document.
+    """
+
+    def __init__(self):
+        self._primary = []
+        self._secondary = []
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    @staticmethod
+    def _entries(doc_id, name, codes):
+        name = normalize_text(name)
+        primary = {(key, doc_id) for key in [name] + [normalize_text(code) for code in codes] if key}
+        words = name.split()
+        secondary = {(' '.join(words[i:]), doc_id) for i in range(1, len(words))}
+        return primary, secondary - primary
+
+    def load(self, documents):
+        """Replace the contents with (doc_id, name, codes, data) tuples, sorting once"""
+        primary, secondary, stored = [], [], {}
+        for doc_id, name, codes, data in documents:
+            doc_primary, doc_secondary = self._entries(doc_id, name, codes)
+            primary.extend(doc_primary)
+            secondary.extend(doc_secondary)
+            stored[doc_id] = (doc_primary, doc_secondary, data)
+        primary.sort()
+        secondary.sort()
+        
+        with self._lock:
+            self._primary, self._secondary, self._documents = primary, secondary, stored
+
+    def add(self, doc_id, name, codes=(), data=None):
+        doc_primary, doc_secondary = self._entries(doc_id, name, codes)
+        with self._lock:
+            self._remove(doc_id)
+            for entry in doc_primary:
+                insort(self._primary, entry)
+            for entry in doc_secondary:
+                insort(self._secondary, entry)
+            self._documents[doc_id] = (doc_primary, doc_secondary, data)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        
+        for entries, sorted_entries in ((document[0], self._primary), (document[1], self._secondary)):
+            for entry in entries:
+                position = bisect_left(sorted_entries, entry)
+                if position < len(sorted_entries) and sorted_entries[position] == entry:
+                    del sorted_entries[position]
+
+    def search(self, prefix, limit=10):
+        """Get up to limit (doc_id, data) pairs whose name, a later word or a code starts with prefix"""
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        
+        results = []
+        seen = set()
+        with self._lock:
+            for sorted_entries in (self._primary, self._secondary):
+                position = bisect_left(sorted_entries, (prefix,))
+                while position < len(sorted_entries) and len(results) < limit:
+                    key, doc_id = sorted_entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    if doc_id not in seen:
+                        seen.add(doc_id)
+                        results.append((doc_id, self._documents[doc_id][2]))
+                    position += 1
+        return results
+
+
+def customer_entry(row):
+    return row.name, (row.email, row.phone), {'label': row.name, 'detail': row.company_name or row.email}
+
+def product_entry(row):
+    return row.product_name, (row.product_code, row.barcode), {'label': row.product_name, 'detail': row.product_code}
+
+# Entities as (model, columns to load, entry builder, active filter, permissions)
+AUTOCOMPLETE_ENTITIES = {
+    'customers': (
+        Customer, ('name', 'email', 'phone', 'company_name', 'is_active'), customer_entry,
+        lambda row: row.is_active is not False, ('customers',)
+    ),
+    'products': (
+        Inventory, ('product_name', 'product_code', 'barcode', 'is_active', 'is_discontinued'), product_entry,
+        lambda row: row.is_active is not False and not row.is_discontinued, ('inventory', 'orders')
+    )
+}
+
+MODEL_ENTITIES = {spec[0]: entity for entity, spec in AUTOCOMPLETE_ENTITIES.items()}
+
+
+class Autocomplete:
+    """Type-ahead over active customers and products, one PrefixIndex per entity
+    
+    Each index is built under its entity's lock by the first lookup in a
+    worker, so requests that never autocomplete do not load it. It is then
+    refreshed incrementally from the highest updated_at seen, the change
+    version, at most every refresh_interval seconds. A commit in this worker
+    that touches an entity refreshes it on the next lookup.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._indexes = {entity: PrefixIndex() for entity in AUTOCOMPLETE_ENTITIES}
+        self._versions = {}
+        self._refreshed_at = {}
+        self._stale = set()
+        self._locks = {entity: threading.Lock() for entity in AUTOCOMPLETE_ENTITIES}
+
+    def init_app(self, app, db):
+        self._db = db
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+
+    def search(self, entity, prefix, limit=10):
+        """Get up to limit dicts with id, label and detail for an entity"""
+        self._refresh_if_due(entity)
+        return [dict(data, id=doc_id) for doc_id, data in self._indexes[entity].search(prefix, limit)]
+
+    def _after_flush(self, session, flush_context):
+        touched = {MODEL_ENTITIES.get(type(record)) for record in session.new | session.dirty | session.deleted}
+        touched.discard(None)
+        if touched:
+            session.info.setdefault(SESSION_STALE_KEY, set()).update(touched)
+
+    def _after_commit(self, session):
+        self._stale.update(session.info.pop(SESSION_STALE_KEY, ()))
+
+    def _after_rollback(self, session):
+        session.info.pop(SESSION_STALE_KEY, None)
+
+    def _refresh_if_due(self, entity):
+        refreshed_at = self._refreshed_at.get(entity)
+        if refreshed_at is not None and entity not in self._stale and time.monotonic() - refreshed_at < self.refresh_interval:
+            return
+        
+        with self._locks[entity]:
+            refreshed_at = self._refreshed_at.get(entity)
+            if refreshed_at is not None and entity not in self._stale and time.monotonic() - refreshed_at < self.refresh_interval:
+                return
+            
+            self._stale.discard(entity)
+            self._load(entity)
+            self._refreshed_at[entity] = time.monotonic()
+
+    def _load(self, entity):
+        model, columns, build_entry, is_active, _ = AUTOCOMPLETE_ENTITIES[entity]
+        index = self._indexes[entity]
+        version = self._versions.get(entity)
+        
+        query = self._db.session.query(model.id, model.updated_at, *(getattr(model, column) for column in columns))
+        if version is None:
+            rows = query.all()
+            index.load(
+                (row.id,) + build_entry(row) for row in rows if is_active(row)
+            )
+        else:
+            rows = query.filter(model.updated_at >= version - REFRESH_OVERLAP).all()
+            for row in rows:
+                if is_active(row):
+                    index.add(row.id, *build_entry(row))
+                else:
+                    index.remove(row.id)
+        
+        for row in rows:
+            if row.updated_at and (version is None or row.updated_at > version):
+                version = row.updated_at
+        self._versions[entity] = version
+
+
+autocomplete = Autocomplete(
+    refresh_interval=float(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL', '30'))
+)
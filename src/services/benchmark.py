@@ -0,0 +1,363 @@
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, insert
+
+from src.models.user import db, User, Department, Employee, Customer
+from src.models.payroll import Order, OrderItem
+from src.models.inventory import Inventory
+from src.services.bulk_import import insert_in_chunks
+from src.services.passwords import password_policy
+from src.services.sales_rollup import rebuild_sales_rollup
+
+
+# Full-size synthetic dataset; pass a scale below 1 for quicker runs
+DATASET_SIZES = {
+    'customers': 100000,
+    'products': 10000,
+    'employees': 5000,
+    'orders': 5000000,
+    'order_items': 20000000
+}
+
+BENCHMARK_PASSWORD = 'benchmark123'
+
+# Read-heavy endpoints exercised by the benchmark, keyed by the name used in baselines
+BENCHMARK_ENDPOINTS = {
+    'orders_list': '/api/orders/?per_page=50',
+    'orders_by_status': '/api/orders/?status=delivered&per_page=50',
+    'orders_deep_page': '/api/orders/?page=200&per_page=50',
+    'orders_search': '/api/orders/?search=00042&per_page=50',
+    'inventory_list': '/api/inventory/?per_page=50',
+    'employees_list': '/api/employees/?per_page=50',
+    # refresh=true skips the dashboard cache so the rollup queries are measured
+    'dashboard': '/api/dashboard/?refresh=true',
+    'dashboard_cached': '/api/dashboard/',
+    'report_sales_summary': '/api/reports/sales-summary',
+    'report_inventory': '/api/reports/inventory-report',
+    'report_employee_performance': '/api/reports/employee-performance',
+    'report_financial_summary': '/api/reports/financial-summary'
+}
+
+EMPLOYEE_ROLES = ('sales_rep', 'sales_rep', 'sales_rep', 'employee', 'employee', 'customer_support', 'sales_manager',
+                  'warehouse_manager', 'logistics_manager', 'finance_manager', 'hr_manager')
+ORDER_STATUSES = ('delivered', 'delivered', 'delivered', 'shipped', 'processing', 'confirmed', 'pending', 'cancelled')
+PAYMENT_STATUSES = {'delivered': 'paid', 'shipped': 'paid', 'cancelled': 'refunded'}
+PRODUCT_CATEGORIES = ('Electronics', 'Furniture', 'Stationery', 'Food', 'Clothing', 'Tools', 'Cleaning', 'Packaging')
+
+
+def get_dataset_sizes(scale=1.0, **overrides):
+    """Get row counts for each table, scaled down from the full dataset"""
+    sizes = {name: max(1, int(count * scale)) for name, count in DATASET_SIZES.items()}
+    sizes.update({name: count for name, count in overrides.items() if count is not None})
+    return sizes
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+def generate_dataset(sizes, seed=0, days=730, chunk_size=5000, progress=None):
+    """Load a synthetic dataset of the given sizes with Core executemany inserts
+    
+    Rows are generated deterministically from seed and streamed in chunks, so
+    memory stays flat however many orders are generated. Emails, numbers and
+    codes are tagged with the seed; use a different seed to add a second
+    dataset to the same database. Every generated user's password is
+    BENCHMARK_PASSWORD. Returns the number of rows inserted per table.
+    """
+    rng = random.Random(seed)
+    tag = f'B{seed}'
+    now = datetime.utcnow()
+    today = now.date()
+    counts = {}
+    
+    department_ids = [row[0] for row in db.session.query(Department.id).all()]
+    if not department_ids:
+        departments = [{'id': _uuid(rng), 'name': f'Benchmark Department {index + 1}'} for index in range(10)]
+        db.session.execute(insert(Department.__table__), departments)
+        db.session.commit()
+        department_ids = [department['id'] for department in departments]
+    
+    # Users and employees; hashing once keeps 5k users from taking minutes
+    password_hash = password_policy.hash(BENCHMARK_PASSWORD)
+    employees = [
+        {
+            'id': _uuid(rng),
+            'user_id': _uuid(rng),
+            'role': rng.choice(EMPLOYEE_ROLES),
+            'department_id': rng.choice(department_ids),
+            'hire_date': today - timedelta(days=rng.randint(30, 3650))
+        }
+        for _ in range(sizes['employees'])
+    ]
+    counts['users'] = insert_in_chunks(User.__table__, (
+        {
+            'id': employee['user_id'],
+            'email': f'{tag.lower()}.employee{index}@example.com',
+            'password_hash': password_hash,
+            'role': employee['role'],
+            'is_active': True
+        }
+        for index, employee in enumerate(employees)
+    ), chunk_size, progress, 'users')
+    counts['employees'] = insert_in_chunks(Employee.__table__, (
+        {
+            'id': employee['id'],
+            'user_id': employee['user_id'],
+            'employee_number': f'{tag}-{index:06d}',
+            'full_name': f'Employee {tag}-{index}',
+            'department_id': employee['department_id'],
+            'job_position': employee['role'].replace('_', ' ').title(),
+            'hire_date': employee['hire_date'],
+            'salary_grade': f'G{rng.randint(1, 9)}',
+            'employment_status': 'active'
+        }
+        for index, employee in enumerate(employees)
+    ), chunk_size, progress, 'employees')
+    sales_rep_ids = [employee['id'] for employee in employees if employee['role'] in ('sales_rep', 'sales_manager')]
+    sales_rep_ids = sales_rep_ids or [employee['id'] for employee in employees]
+    del employees
+    
+    customer_ids = [_uuid(rng) for _ in range(sizes['customers'])]
+    counts['customers'] = insert_in_chunks(Customer.__table__, (
+        {
+            'id': customer_id,
+            'name': f'Customer {tag}-{index}',
+            'email': f'{tag.lower()}.customer{index}@example.com',
+            'phone': f'+1555{index:07d}',
+            'customer_type': 'business' if index % 4 == 0 else 'individual',
+            'company_name': f'Company {index}' if index % 4 == 0 else None,
+            'is_active': True
+        }
+        for index, customer_id in enumerate(customer_ids)
+    ), chunk_size, progress, 'customers')
+    
+    products = []
+    for index in range(sizes['products']):
+        cost = rng.uniform(1, 400)
+        products.append({
+            'id': _uuid(rng),
+            'product_code': f'{tag}-P{index:06d}',
+            'product_name': f'Product {tag}-{index}',
+            'category': rng.choice(PRODUCT_CATEGORIES),
+            'brand': f'Brand {index % 50}',
+            'barcode': f'{seed:03d}{index:010d}',
+            'quantity_in_stock': _money(rng.randint(0, 2000)),
+            'minimum_stock_level': _money(rng.randint(5, 50)),
+            'cost_price': _money(cost),
+            'selling_price': _money(cost * rng.uniform(1.1, 1.8)),
+            'is_active': True
+        })
+    counts['products'] = insert_in_chunks(Inventory.__table__, products, chunk_size, progress, 'products')
+    
+    # Orders get explicit ids so their items can be generated alongside them
+    first_order_id = (db.session.query(func.max(Order.id)).scalar() or 0) + 1
+    items_per_order, extra_items = divmod(sizes['order_items'], max(sizes['orders'], 1))
+    order_items = []
+
+    def order_rows():
+        for index in range(sizes['orders']):
+            order_id = first_order_id + index
+            order_date = today - timedelta(days=rng.randint(0, days))
+            created_at = datetime.combine(order_date, datetime.min.time()) + timedelta(seconds=rng.randint(0, 86399))
+            status = rng.choice(ORDER_STATUSES)
+            
+            subtotal = Decimal('0')
+            for _ in range(items_per_order + (1 if index < extra_items else 0)):
+                product = products[rng.randrange(len(products))]
+                quantity = rng.randint(1, 10)
+                line_total = product['selling_price'] * quantity
+                subtotal += line_total
+                order_items.append({
+                    'order_id': order_id,
+                    'product_id': product['id'],
+                    'product_name': product['product_name'],
+                    'product_sku': product['product_code'],
+                    'quantity': _money(quantity),
+                    'unit_price': product['selling_price'],
+                    'subtotal': line_total,
+                    'created_at': created_at
+                })
+            
+            tax_amount = _money(subtotal * Decimal('0.1'))
+            yield {
+                'id': order_id,
+                'order_number': f'ORD-{tag}-{order_id:08d}',
+                'customer_id': customer_ids[rng.randrange(len(customer_ids))],
+                'sales_rep_id': sales_rep_ids[rng.randrange(len(sales_rep_ids))],
+                'order_date': order_date,
+                'subtotal': subtotal,
+                'tax_rate': Decimal('10.00'),
+                'tax_amount': tax_amount,
+                'total': subtotal + tax_amount,
+                'status': status,
+                'payment_status': PAYMENT_STATUSES.get(status, 'pending'),
+                'priority': rng.choice(('normal', 'normal', 'normal', 'low', 'high', 'urgent')),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+    
+    # Items are flushed after each chunk of their orders to satisfy the foreign key
+    counts['orders'] = 0
+    counts['order_items'] = 0
+    orders = order_rows()
+    while True:
+        chunk = [row for _, row in zip(range(chunk_size), orders)]
+        if not chunk:
+            break
+        db.session.execute(insert(Order.__table__), chunk)
+        counts['order_items'] += insert_in_chunks(OrderItem.__table__, order_items, chunk_size * 4)
+        order_items.clear()
+        counts['orders'] += len(chunk)
+        if progress:
+            progress('orders', counts['orders'])
+    
+    # Dashboards and reports read totals from the rollup
+    rebuild_sales_rollup()
+    return counts
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+def get_benchmark_token(role='admin'):
+    """Create an access token for the first active user with a role"""
+    user = User.query.filter_by(role=role, is_active=True).order_by(User.created_at).first()
+    if user is None:
+        raise ValueError(f'No active {role} user to run the benchmark as')
+    
+    employee = Employee.query.filter_by(user_id=user.id).first()
+    return create_access_token(
+        identity=user.id,
+        additional_claims={
+            'role': user.role,
+            'email': user.email,
+            'employee_id': employee.id if employee else None
+        }
+    )
+
+def run_benchmark(app, endpoints=None, requests_per_endpoint=200, concurrency=8, warmup=5, base_url=None):
+    """Measure latency percentiles per endpoint under concurrent load
+    
+    Requests go through a Flask test client per thread, or over HTTP to a
+    running server such as a local gunicorn when base_url is given; the server
+    must share the app's JWT secret. Returns a JSON-serializable result.
+    """
+    endpoints = endpoints or BENCHMARK_ENDPOINTS
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {get_benchmark_token()}'}
+        database = db.engine.url.render_as_string(hide_password=True)
+    
+    local = threading.local()
+
+    def send(path):
+        started = time.perf_counter()
+        if base_url:
+            try:
+                with urllib.request.urlopen(urllib.request.Request(base_url.rstrip('/') + path, headers=headers)) as response:
+                    response.read()
+                    status, query_count = response.status, response.headers.get('X-Query-Count')
+            except urllib.error.HTTPError as e:
+                status, query_count = e.code, e.headers.get('X-Query-Count')
+            except OSError:
+                status, query_count = None, None
+        else:
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            response = local.client.get(path, headers=headers)
+            status, query_count = response.status_code, response.headers.get('X-Query-Count')
+        return time.perf_counter() - started, status, query_count
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for name, path in endpoints.items():
+            list(executor.map(send, [path] * warmup))
+            
+            started = time.perf_counter()
+            samples = list(executor.map(send, [path] * requests_per_endpoint))
+            elapsed = time.perf_counter() - started
+            
+            latencies = sorted(sample[0] * 1000 for sample in samples)
+            query_counts = [int(sample[2]) for sample in samples if sample[2] is not None]
+            results[name] = {
+                'path': path,
+                'requests': len(samples),
+                'errors': sum(1 for sample in samples if sample[1] is None or sample[1] >= 400),
+                'throughput_rps': round(len(samples) / elapsed, 1),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'avg_queries': round(sum(query_counts) / len(query_counts), 1) if query_counts else None
+            }
+    
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'database': database,
+        'target': base_url or 'test_client',
+        'concurrency': concurrency,
+        'requests_per_endpoint': requests_per_endpoint,
+        'endpoints': results
+    }
+
+def compare_to_baseline(result, baseline, tolerance=0.2, min_delta_ms=5.0):
+    """Find endpoints that got slower or started failing since a baseline run
+    
+    A percentile regresses when it exceeds the baseline by more than tolerance
+    (a fraction) and by at least min_delta_ms, so noise on fast endpoints is
+    not reported. Endpoints missing from the baseline are skipped.
+    """
+    regressions = []
+    for name, current in result['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + tolerance) and current[metric] - previous[metric] >= min_delta_ms:
+                regressions.append({
+                    'endpoint': name,
+                    'metric': metric,
+                    'baseline': previous[metric],
+                    'current': current[metric],
+                    'change_percent': round((current[metric] / previous[metric] - 1) * 100, 1) if previous[metric] else None
+                })
+        
+        if current['errors'] and not previous['errors']:
+            regressions.append({
+                'endpoint': name,
+                'metric': 'errors',
+                'baseline': 0,
+                'current': current['errors'],
+                'change_percent': None
+            })
+    return regressions
+
+def load_baseline(path):
+    """Read a saved benchmark result"""
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+def save_baseline(result, path):
+    """Write a benchmark result for later comparison"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump(result, baseline_file, indent=2)
@@ -0,0 +1,530 @@
+import csv
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, bindparam, insert, inspect, update
+
+from src.models.user import db, User, Department, Employee, Customer
+from src.models.payroll import Order, OrderItem
+from src.models.inventory import Inventory
+from src.services.dashboard_cache import invalidate_dashboards
+from src.services.sales_rollup import rebuild_sales_rollup
+from src.services.search_index import SEARCH_KEY_LENGTH, normalize_text
+from src.services.search_keys import SEARCH_KEY_SOURCES
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Imported users cannot log in until they reset their password
+UNUSABLE_PASSWORD_HASH = '!'
+
+# Resolved natural keys kept between chunks, per key type
+RESOLVER_CACHE_SIZE = 200000
+
+# Employees whose manager is linked per UPDATE batch
+MANAGER_UPDATE_CHUNK_SIZE = 5000
+
+# Errors reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'f', 'no', 'n')
+
+
+class BulkImportError(ValueError):
+    """A record that cannot be imported, or an import that hit too many of them"""
+
+    def __init__(self, message, line=None):
+        super().__init__(f'line {line}: {message}' if line else message)
+        self.line = line
+
+
+def read_records(path, file_format=None):
+    """Yield (line number, record) pairs from a CSV or NDJSON file
+    
+    The format is taken from the file extension unless given.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if file_format == 'jsonl':
+        file_format = 'ndjson'
+    if file_format not in IMPORT_FORMATS:
+        raise BulkImportError(f'Unsupported import format: {file_format or "unknown"}')
+    
+    with open(path, newline='', encoding='utf-8-sig') as import_file:
+        if file_format == 'csv':
+            reader = csv.DictReader(import_file)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line, text in enumerate(import_file, 1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError as e:
+                    yield line, BulkImportError(f'Invalid JSON: {e}', line)
+
+def insert_in_chunks(table, rows, chunk_size, progress=None, label=None):
+    """Insert rows from an iterable with one executemany per chunk, committing each chunk"""
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            chunk = []
+            if progress:
+                progress(label, inserted)
+    
+    if chunk:
+        db.session.execute(insert(table), chunk)
+        db.session.commit()
+        inserted += len(chunk)
+        if progress:
+            progress(label, inserted)
+    return inserted
+
+def coerce_value(column, value):
+    """Convert a raw CSV/JSON value to the Python type of a column"""
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return None
+    
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f'{column.name}: not a boolean: {value!r}')
+    if isinstance(column_type, DateTime):
+        return value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    if isinstance(column_type, Date):
+        if isinstance(value, date):
+            return value
+        return datetime.fromisoformat(str(value).strip()).date()
+    if isinstance(column_type, Numeric) and not isinstance(column_type, Integer):
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f'{column.name}: not a number: {value!r}')
+    if isinstance(column_type, Integer):
+        return int(value)
+    return str(value) if not isinstance(value, str) else value.strip()
+
+def get_column_default(column):
+    """Get the value a Core insert would use for a column left out of a row
+    
+    Defaults that read other values of the row through the execution context
+    cannot be computed here, so they are left as None.
+    """
+    default = column.default
+    if default is None or not default.is_scalar and not default.is_callable:
+        return None
+    if default.is_callable and not hasattr(default.arg, '__wrapped__'):
+        # SQLAlchemy wraps defaults that take no context; unwrapped ones need one
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+class KeyResolver:
+    """Resolve natural keys (emails, codes, numbers) to rows, one IN query per chunk"""
+
+    def __init__(self, key_column, *columns):
+        self.key_column = key_column
+        self.columns = columns
+        self._cache = {}
+
+    def resolve(self, keys):
+        """Look up any keys not seen before; returns the full key -> row mapping"""
+        missing = {key for key in keys if key is not None and key not in self._cache}
+        if missing:
+            if len(self._cache) + len(missing) > RESOLVER_CACHE_SIZE:
+                self._cache.clear()
+            found = {row[0]: row for row in db.session.query(self.key_column, *self.columns).filter(
+                self.key_column.in_(missing)
+            )}
+            for key in missing:
+                self._cache[key] = found.get(key)
+        return self._cache
+
+    def get(self, key):
+        return self._cache.get(key)
+
+
+class TableImporter:
+    """Turn raw records for one model into Core insert rows, chunk by chunk
+    
+    Fields are matched to columns by attribute or column name; unknown fields
+    are ignored. Subclasses resolve natural-key references such as a customer
+    email and may insert dependent rows after each chunk.
+    """
+    
+    model = None
+
+    def __init__(self):
+        self.table = self.model.__table__
+        self.columns = {}
+        for attribute in inspect(self.model).column_attrs:
+            column = attribute.columns[0]
+            self.columns[attribute.key] = column
+            self.columns[column.name] = column
+        self.search_key_source = dict(SEARCH_KEY_SOURCES).get(self.model)
+        self.counts = {}
+
+    def build_row(self, record):
+        row = {}
+        for field, value in record.items():
+            column = self.columns.get(field)
+            if column is not None:
+                row[column.name] = coerce_value(column, value)
+        if self.search_key_source:
+            # Set here so every row has it; the column default needs an execution context
+            row['search_key'] = normalize_text(row.get(self.search_key_source))[:SEARCH_KEY_LENGTH] or None
+        return row
+
+    def prepare(self, records):
+        """Build insert rows for a chunk of (line, record) pairs
+        
+        Returns (rows, errors) where errors are BulkImportErrors for skipped records.
+        """
+        rows = []
+        errors = []
+        for line, record in records:
+            try:
+                rows.append(self.build_row(record))
+            except (ValueError, TypeError) as e:
+                errors.append(BulkImportError(str(e), line))
+        return rows, errors
+
+    def insert(self, rows):
+        db.session.execute(insert(self.table), fill_defaults(self.table, rows))
+        self.counts[self.table.name] = self.counts.get(self.table.name, 0) + len(rows)
+
+    def finish(self):
+        """Link or refresh data once every chunk has been committed
+        
+        Returns BulkImportErrors for records that could only be partly imported.
+        """
+        return []
+
+
+def fill_defaults(table, rows):
+    """Give every row the same keys, as executemany requires, using column defaults"""
+    keys = set()
+    for row in rows:
+        keys.update(row)
+    defaults = {column.name: column for column in table.columns if column.name in keys}
+    for row in rows:
+        for key, column in defaults.items():
+            if row.get(key) is None:
+                row[key] = get_column_default(column)
+    return rows
+
+
+class CustomerImporter(TableImporter):
+    model = Customer
+
+    def finish(self):
+        invalidate_dashboards('customers')
+        return []
+
+
+class InventoryImporter(TableImporter):
+    model = Inventory
+
+    def finish(self):
+        invalidate_dashboards('inventory')
+        return []
+
+
+class EmployeeImporter(TableImporter):
+    """Employees, creating a login for each record given by email instead of user_id
+    
+    department is resolved by name. manager_number may refer to an employee
+    later in the same file, so managers are linked once every chunk is in.
+    """
+    
+    model = Employee
+
+    def __init__(self):
+        super().__init__()
+        self.departments = KeyResolver(Department.name, Department.id)
+        self.managers = KeyResolver(Employee.employee_number, Employee.id)
+        self.user_rows = []
+        self.pending_managers = []
+
+    def prepare(self, records):
+        records = list(records)
+        self.departments.resolve({record.get('department') for _, record in records if isinstance(record, dict)})
+        self.user_rows = []
+        return super().prepare(records)
+
+    def build_row(self, record):
+        row = super().build_row(record)
+        
+        if record.get('department') and not row.get('department_id'):
+            department = self.departments.get(record['department'])
+            if department is None:
+                raise ValueError(f'Unknown department: {record["department"]}')
+            row['department_id'] = department.id
+        
+        for field in ('employee_number', 'full_name', 'job_position'):
+            if not row.get(field):
+                raise ValueError(f'{field} is required')
+        
+        if not row.get('user_id'):
+            if not record.get('email'):
+                raise ValueError('Either user_id or email is required')
+            user_id = get_column_default(User.__table__.c.id)
+            self.user_rows.append({
+                'id': user_id,
+                'email': str(record['email']).strip().lower(),
+                'password_hash': UNUSABLE_PASSWORD_HASH,
+                'role': record.get('role') or 'employee',
+                'is_active': True
+            })
+            row['user_id'] = user_id
+        
+        # Only once the row can no longer be rejected, so finish() links no missing employee
+        if record.get('manager_number') and not row.get('manager_id'):
+            row['id'] = row.get('id') or get_column_default(self.table.c.id)
+            self.pending_managers.append((row['id'], row['employee_number'], str(record['manager_number']).strip()))
+        return row
+
+    def insert(self, rows):
+        if self.user_rows:
+            db.session.execute(insert(User.__table__), fill_defaults(User.__table__, self.user_rows))
+            self.counts['users'] = self.counts.get('users', 0) + len(self.user_rows)
+        super().insert(rows)
+
+    def finish(self):
+        errors = []
+        for start in range(0, len(self.pending_managers), MANAGER_UPDATE_CHUNK_SIZE):
+            pending = self.pending_managers[start:start + MANAGER_UPDATE_CHUNK_SIZE]
+            self.managers.resolve({manager_number for _, _, manager_number in pending})
+            
+            updates = []
+            for employee_id, employee_number, manager_number in pending:
+                manager = self.managers.get(manager_number)
+                if manager is None:
+                    errors.append(BulkImportError(f'Employee {employee_number}: unknown manager employee number: {manager_number}'))
+                else:
+                    updates.append({'employee_id': employee_id, 'manager_id': manager.id})
+            
+            if updates:
+                db.session.execute(
+                    update(self.table).where(self.table.c.id == bindparam('employee_id')).values(manager_id=bindparam('manager_id')),
+                    updates
+                )
+                db.session.commit()
+        invalidate_dashboards('employees')
+        return errors
+
+
+class OrderImporter(TableImporter):
+    """Orders, with their items nested under "items" in NDJSON records
+    
+    customer_email, sales_rep_number and each item's product_code are resolved
+    to ids. Totals missing from a record are calculated from its items. The
+    daily sales rollup is rebuilt for the imported dates at the end.
+    """
+    
+    model = Order
+
+    def __init__(self):
+        super().__init__()
+        self.customers = KeyResolver(Customer.email, Customer.id)
+        self.sales_reps = KeyResolver(Employee.employee_number, Employee.id)
+        self.items = OrderItemImporter(orders=False)
+        self.item_rows = {}
+        self.first_date = None
+        self.last_date = None
+
+    def prepare(self, records):
+        records = [(line, record) for line, record in records]
+        dicts = [record for _, record in records if isinstance(record, dict)]
+        self.customers.resolve({record.get('customer_email') for record in dicts})
+        self.sales_reps.resolve({record.get('sales_rep_number') for record in dicts})
+        self.items.products.resolve({
+            item.get('product_code') for record in dicts for item in record.get('items') or () if isinstance(item, dict)
+        })
+        self.item_rows = {}
+        return super().prepare(records)
+
+    def build_row(self, record):
+        row = super().build_row(record)
+        
+        if not row.get('order_number'):
+            raise ValueError('order_number is required')
+        
+        if record.get('customer_email') and not row.get('customer_id'):
+            customer = self.customers.get(record['customer_email'])
+            if customer is None:
+                raise ValueError(f'Unknown customer email: {record["customer_email"]}')
+            row['customer_id'] = customer.id
+        if not row.get('customer_id'):
+            raise ValueError('customer_id or customer_email is required')
+        
+        if record.get('sales_rep_number') and not row.get('sales_rep_id'):
+            sales_rep = self.sales_reps.get(record['sales_rep_number'])
+            if sales_rep is None:
+                raise ValueError(f'Unknown sales rep employee number: {record["sales_rep_number"]}')
+            row['sales_rep_id'] = sales_rep.id
+        
+        items = [self.items.build_row(item) for item in record.get('items') or ()]
+        if items and row.get('total') is None:
+            row['subtotal'] = sum(item['subtotal'] for item in items)
+            row['tax_amount'] = row['subtotal'] * (row.get('tax_rate') or 0) / 100
+            row['total'] = row['subtotal'] + row['tax_amount'] - (row.get('discount_amount') or 0) + (row.get('shipping_cost') or 0)
+        self.item_rows[row['order_number']] = items
+        
+        if row.get('order_date') is None:
+            row['order_date'] = get_column_default(self.table.c.order_date)
+        self.first_date = min(self.first_date or row['order_date'], row['order_date'])
+        self.last_date = max(self.last_date or row['order_date'], row['order_date'])
+        return row
+
+    def insert(self, rows):
+        super().insert(rows)
+        
+        # Resolve generated ids by order number to attach the items
+        item_rows = []
+        order_numbers = [row['order_number'] for row in rows if self.item_rows.get(row['order_number'])]
+        if order_numbers:
+            for order_id, order_number in db.session.query(Order.id, Order.order_number).filter(
+                Order.order_number.in_(order_numbers)
+            ):
+                for item in self.item_rows[order_number]:
+                    item['order_id'] = order_id
+                    item_rows.append(item)
+        if item_rows:
+            self.items.insert(item_rows)
+            self.counts['order_items'] = self.items.counts['order_items']
+
+    def finish(self):
+        if self.first_date:
+            rebuild_sales_rollup(self.first_date, self.last_date)
+        invalidate_dashboards('orders')
+        return []
+
+
+class OrderItemImporter(TableImporter):
+    """Order items for orders already imported, referenced by order_number
+    
+    product_code is resolved to the product, whose name is used when the
+    record has none. Missing subtotals are calculated.
+    """
+    
+    model = OrderItem
+
+    def __init__(self, orders=True):
+        super().__init__()
+        self.products = KeyResolver(Inventory.product_code, Inventory.id, Inventory.product_name)
+        self.orders = KeyResolver(Order.order_number, Order.id) if orders else None
+
+    def prepare(self, records):
+        records = list(records)
+        dicts = [record for _, record in records if isinstance(record, dict)]
+        self.products.resolve({record.get('product_code') for record in dicts})
+        self.orders.resolve({record.get('order_number') for record in dicts})
+        return super().prepare(records)
+
+    def build_row(self, record):
+        row = super().build_row(record)
+        # An item's own id never carries over from the source system
+        row.pop('id', None)
+        
+        if self.orders is not None and not row.get('order_id'):
+            order = self.orders.get(record.get('order_number'))
+            if order is None:
+                raise ValueError(f'Unknown order number: {record.get("order_number")}')
+            row['order_id'] = order.id
+        
+        if record.get('product_code') and not row.get('product_id'):
+            product = self.products.get(record['product_code'])
+            if product is None:
+                raise ValueError(f'Unknown product code: {record["product_code"]}')
+            row['product_id'] = product.id
+            row['product_name'] = row.get('product_name') or product.product_name
+            row['product_sku'] = row.get('product_sku') or record['product_code']
+        
+        if not row.get('product_name'):
+            raise ValueError('product_name or product_code is required')
+        if row.get('unit_price') is None:
+            raise ValueError('unit_price is required')
+        
+        row['quantity'] = row.get('quantity') or Decimal('1')
+        if row.get('subtotal') is None:
+            line_total = row['quantity'] * row['unit_price']
+            if row.get('discount_percent'):
+                row['discount_amount'] = line_total * row['discount_percent'] / 100
+            row['subtotal'] = line_total - (row.get('discount_amount') or 0)
+        return row
+
+
+IMPORTERS = {
+    'employees': EmployeeImporter,
+    'customers': CustomerImporter,
+    'inventory': InventoryImporter,
+    'orders': OrderImporter,
+    'order_items': OrderItemImporter
+}
+
+
+def import_records(table_name, records, chunk_size=5000, max_errors=0, progress=None):
+    """Bulk-load (line, record) pairs into a table with Core executemany inserts
+    
+    Records are validated and inserted chunk by chunk, each chunk in its own
+    transaction, so ORM events and per-row flushes are skipped entirely. Bad
+    records are skipped until more than max_errors have been seen, at which
+    point BulkImportError is raised; chunks already committed stay imported.
+    Returns (rows inserted per table, skipped record count, first errors).
+    """
+    importer = IMPORTERS[table_name]()
+    errors = []
+    skipped = 0
+    records = iter(records)
+    
+    while True:
+        chunk = [record for _, record in zip(range(chunk_size), records)]
+        if not chunk:
+            break
+        
+        # Unreadable lines come through as errors in place of records
+        readable = [(line, record) for line, record in chunk if not isinstance(record, Exception)]
+        chunk_errors = [record for _, record in chunk if isinstance(record, Exception)]
+        chunk_errors += [
+            BulkImportError('Record is not an object', line) for line, record in readable if not isinstance(record, dict)
+        ]
+        rows, build_errors = importer.prepare((line, record) for line, record in readable if isinstance(record, dict))
+        chunk_errors += build_errors
+        
+        skipped += len(chunk_errors)
+        errors += chunk_errors[:max(0, MAX_REPORTED_ERRORS - len(errors))]
+        if skipped > max_errors:
+            db.session.rollback()
+            raise BulkImportError(f'Import stopped after {skipped} bad records; first error: {errors[0]}')
+        
+        if rows:
+            try:
+                importer.insert(rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                first_line = chunk[0][0]
+                raise BulkImportError(f'Chunk starting at line {first_line} failed: {getattr(e, "orig", None) or e}')
+        
+        if progress:
+            progress(importer.counts, skipped)
+    
+    # Partly imported records are reported but do not stop the import
+    finish_errors = importer.finish()
+    errors += finish_errors[:max(0, MAX_REPORTED_ERRORS - len(errors))]
+    return importer.counts, skipped + len(finish_errors), errors
@@ -0,0 +1,53 @@
+import os
+
+from src.services.cache import TTLCache
+
+
+dashboard_cache = TTLCache(
+    maxsize=int(os.getenv('DASHBOARD_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+)
+
+# Dashboards that read data owned by each blueprint. Expenses and invoices have
+# no write routes, so the finance dashboard's counts of them rely on the TTL.
+DASHBOARD_DEPENDENCIES = {
+    'orders': ('admin', 'sales_manager', 'finance_manager', 'logistics_manager', 'sales_rep'),
+    'inventory': ('admin', 'warehouse_manager'),
+    'payroll': ('hr_manager', 'employee'),
+    'employees': ('admin', 'hr_manager', 'employee'),
+    'customers': ('admin', 'customer_support')
+}
+
+# Roles whose dashboard is scoped to a single employee
+EMPLOYEE_SCOPED_ROLES = ('sales_rep', 'employee')
+
+
+def get_dashboard_cache_key(role, user_id=None, employee_id=None, months=None):
+    """Build the cache key for a role's dashboard payload"""
+    if role in EMPLOYEE_SCOPED_ROLES:
+        return (role, employee_id)
+    if role == 'admin':
+        # The admin payload includes the user's own notifications
+        return (role, user_id, months)
+    return (role,)
+
+def invalidate_dashboards(source, employee_id=None):
+    """Drop cached dashboards that depend on data written by a blueprint
+    
+    When employee_id is given, employee-scoped dashboards are only dropped for
+    that employee.
+    """
+    roles = DASHBOARD_DEPENDENCIES.get(source, ())
+
+    def is_stale(key):
+        if key[0] not in roles:
+            return False
+        if key[0] in EMPLOYEE_SCOPED_ROLES and employee_id is not None:
+            return key[1] == employee_id
+        return True
+    
+    return dashboard_cache.invalidate(is_stale)
+
+def invalidate_user_dashboard(user_id):
+    """Drop cached admin dashboards for one user, e.g. after reading a notification"""
+    return dashboard_cache.invalidate(lambda key: key[0] == 'admin' and key[1] == user_id)
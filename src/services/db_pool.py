@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from src.services.metrics import Histogram
+
+
+class PoolMetrics:
+    """Connection pool counters fed by SQLAlchemy pool events"""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self.wait_time = Histogram()
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        """Attach pool event listeners to the app's default engine"""
+        with app.app_context():
+            engine = db.engine
+
+        self._pool = engine.pool
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        event.listen(engine, 'soft_invalidate', self._on_invalidate)
+
+    def observe_wait(self, seconds, timed_out=False):
+        """Record how long a checkout waited for a connection"""
+        self.wait_time.observe(seconds)
+        if timed_out:
+            with self._lock:
+                self.timeouts += 1
+
+    def stats(self):
+        """Get pool counters, current occupancy and the checkout wait histogram"""
+        pool = self._pool
+        current = {}
+        if isinstance(pool, QueuePool):
+            current = {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout()
+            }
+
+        with self._lock:
+            return {
+                'pool_class': type(pool).__name__ if pool else None,
+                'current': current,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'peak_checked_out': self.peak_checked_out,
+                'peak_overflow': self.peak_overflow,
+                'wait_seconds': self.wait_time.snapshot()
+            }
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        pool = self._pool
+        with self._lock:
+            self.checkouts += 1
+            if isinstance(pool, QueuePool):
+                self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a free connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+def get_engine_options(database_url):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from DB_POOL_* environment variables
+
+    Pool sizing is per process, so with gunicorn the database sees up to
+    workers * (pool_size + max_overflow) connections.
+    """
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '300')),
+    }
+
+    # SQLite uses its own pool types that do not take sizing arguments
+    if not database_url.startswith('sqlite'):
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            'pool_use_lifo': os.getenv('DB_POOL_USE_LIFO', '0') == '1'
+        })
+
+    return options
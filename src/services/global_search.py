@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import event, or_
+
+from src.models.user import User, Employee, Customer
+from src.models.payroll import Order
+from src.services.search_index import NgramIndex, prefix_condition
+
+
+# Rows re-read before the last seen updated_at, for writes that committed late
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+# Prefix of generated order numbers, added to queries that omit it
+ORDER_NUMBER_PREFIX = 'ORD-'
+
+# Scores for order number matches, on the same scale as NgramIndex scores
+EXACT_MATCH_SCORE = 10.0
+PREFIX_MATCH_SCORE = 3.0
+
+SESSION_PENDING_KEY = 'global_search_pending'
+
+
+def customer_document(customer):
+    return (
+        (customer.name, customer.company_name, customer.email),
+        (customer.email, customer.phone, customer.tax_number),
+        {'label': customer.name, 'detail': customer.company_name or customer.email}
+    )
+
+def employee_document(employee):
+    return (
+        (employee.full_name, employee.employee_number),
+        (employee.employee_number, employee.phone),
+        {'label': employee.full_name, 'detail': employee.employee_number}
+    )
+
+def user_document(user):
+    return (
+        (user.email,),
+        (user.email,),
+        {'label': user.email, 'detail': user.role}
+    )
+
+# Indexed entity types as (model, columns to load, document builder, permission).
+# A permission of None means any authenticated user, as for the employee list.
+INDEXED_TYPES = {
+    'customer': (Customer, ('name', 'company_name', 'email', 'phone', 'tax_number'), customer_document, 'customers'),
+    'employee': (Employee, ('full_name', 'employee_number', 'phone'), employee_document, None),
+    'user': (User, ('email', 'role'), user_document, 'hr')
+}
+
+# Orders are matched through the unique order_number index instead of being held
+# in memory, since there are orders of magnitude more of them
+ORDER_PERMISSION = 'orders'
+
+SEARCH_TYPES = tuple(INDEXED_TYPES) + ('order',)
+SEARCH_PERMISSIONS = dict(
+    {search_type: spec[3] for search_type, spec in INDEXED_TYPES.items()},
+    order=ORDER_PERMISSION
+)
+
+MODEL_TYPES = {spec[0]: search_type for search_type, spec in INDEXED_TYPES.items()}
+MODEL_DOCUMENTS = {search_type: spec[2] for search_type, spec in INDEXED_TYPES.items()}
+
+
+class GlobalSearch:
+    """Ranked search across customers, employees, users and orders
+    
+    Customers, employees and users share one in-process n-gram index with
+    (type, id) document ids. It is loaded on first use, updated when a session
+    commits changes to those models, and refreshed from updated_at at most
+    every refresh_interval seconds so other workers' writes and bulk imports
+    show up. It is rebuilt every rebuild_interval seconds to drop rows other
+    workers deleted; the new index is built while searches keep using the
+    current one, then swapped in.
+    """
+
+    def __init__(self, refresh_interval=5, rebuild_interval=600):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._index = NgramIndex()
+        self._loaded_until = {}
+        self._refreshed_at = None
+        self._rebuilt_at = None
+        self._rebuild_changes = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # Guards the index swap and the changes recorded during a rebuild
+        self._swap_lock = threading.Lock()
+
+    def init_app(self, app, db):
+        """Keep the index in sync with writes made through the app's session"""
+        self._db = db
+        if not event.contains(db.session, 'after_flush', self._after_flush):
+            event.listen(db.session, 'after_flush', self._after_flush)
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+
+    def search(self, query, types=SEARCH_TYPES, limit=20):
+        """Get up to limit matches as dicts with type, id, label, detail and score"""
+        query = ' '.join(query.split())
+        if not query:
+            return []
+        
+        results = []
+        indexed_types = [search_type for search_type in types if search_type in INDEXED_TYPES]
+        if indexed_types:
+            self._refresh_if_due()
+            index = self._index
+            # Over-fetch when filtering by type so enough results are left
+            fetch = limit if len(indexed_types) == len(INDEXED_TYPES) else limit * len(INDEXED_TYPES)
+            for (search_type, record_id), score in index.search(query, fetch):
+                if search_type in indexed_types:
+                    data = index.get((search_type, record_id)) or {}
+                    results.append(dict(data, type=search_type, id=record_id, score=round(score, 3)))
+        
+        if 'order' in types:
+            results.extend(self._search_orders(query, limit))
+        
+        results.sort(key=lambda result: (-result['score'], result['type'], str(result['label'])))
+        return results[:limit]
+
+    def _search_orders(self, query, limit):
+        prefixes = {query, query.upper()}
+        if not query.upper().startswith(ORDER_NUMBER_PREFIX):
+            prefixes.add(ORDER_NUMBER_PREFIX + query.upper())
+        
+        rows = self._db.session.query(Order.id, Order.order_number, Order.status).filter(
+            or_(*(prefix_condition(Order.order_number, prefix) for prefix in prefixes))
+        ).order_by(Order.order_number.desc()).limit(limit)
+        
+        return [{
+            'type': 'order',
+            'id': order_id,
+            'label': order_number,
+            'detail': status,
+            'score': EXACT_MATCH_SCORE if order_number in prefixes else PREFIX_MATCH_SCORE
+        } for order_id, order_number, status in rows]
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault(SESSION_PENDING_KEY, {})
+        for record in session.new | session.dirty:
+            search_type = MODEL_TYPES.get(type(record))
+            if search_type:
+                pending[(search_type, record.id)] = MODEL_DOCUMENTS[search_type](record)
+        for record in session.deleted:
+            search_type = MODEL_TYPES.get(type(record))
+            if search_type:
+                pending[(search_type, record.id)] = None
+
+    def _after_commit(self, session):
+        pending = session.info.pop(SESSION_PENDING_KEY, None)
+        if not pending:
+            return
+        
+        with self._swap_lock:
+            if self._rebuild_changes is not None:
+                # Replayed on the index being built, which may have read these rows before the commit
+                self._rebuild_changes.update(pending)
+            index = self._index if self._refreshed_at is not None else None
+        if index is not None:
+            self._apply(index, pending)
+
+    def _after_rollback(self, session):
+        session.info.pop(SESSION_PENDING_KEY, None)
+
+    @staticmethod
+    def _apply(index, changes):
+        for doc_id, document in changes.items():
+            if document is None:
+                index.remove(doc_id)
+            else:
+                texts, keys, data = document
+                index.add(doc_id, texts, keys, data)
+
+    def _refresh_if_due(self):
+        if self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.rebuild_interval:
+            # Only the first load makes searches wait
+            self._rebuild(blocking=self._rebuilt_at is None)
+        
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        
+        with self._lock:
+            if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return
+            
+            self._load(self._index, self._loaded_until)
+            self._refreshed_at = time.monotonic()
+
+    def _rebuild(self, blocking):
+        if not self._rebuild_lock.acquire(blocking=blocking):
+            return
+        try:
+            if self._rebuilt_at is not None and time.monotonic() - self._rebuilt_at < self.rebuild_interval:
+                return
+            
+            with self._swap_lock:
+                self._rebuild_changes = {}
+            index = NgramIndex()
+            loaded_until = {}
+            try:
+                self._load(index, loaded_until)
+            except Exception:
+                with self._swap_lock:
+                    self._rebuild_changes = None
+                raise
+            
+            with self._swap_lock:
+                self._apply(index, self._rebuild_changes)
+                self._rebuild_changes = None
+                self._index = index
+                self._loaded_until = loaded_until
+                self._rebuilt_at = self._refreshed_at = time.monotonic()
+        finally:
+            self._rebuild_lock.release()
+
+    def _load(self, index, loaded_until):
+        # Re-adding rows already indexed is harmless
+        for search_type, (model, columns, build_document, _) in INDEXED_TYPES.items():
+            query = self._db.session.query(model.id, model.updated_at, *(getattr(model, column) for column in columns))
+            if loaded_until.get(search_type) is not None:
+                query = query.filter(model.updated_at >= loaded_until[search_type] - REFRESH_OVERLAP)
+            
+            latest = loaded_until.get(search_type)
+            for row in query.yield_per(1000):
+                texts, keys, data = build_document(row)
+                index.add((search_type, row.id), texts, keys, data)
+                if row.updated_at and (latest is None or row.updated_at > latest):
+                    latest = row.updated_at
+            loaded_until[search_type] = latest
+
+
+global_search = GlobalSearch(
+    refresh_interval=float(os.getenv('GLOBAL_SEARCH_REFRESH_INTERVAL', '5')),
+    rebuild_interval=float(os.getenv('GLOBAL_SEARCH_REBUILD_INTERVAL', '600'))
+)
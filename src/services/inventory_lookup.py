@@ -0,0 +1,70 @@
+import os
+
+from sqlalchemy import func, update
+
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.services.cache import TTLCache
+
+
+# Serialized items keyed by ('barcode', value) and ('code', value). Misses are not
+# cached, so items created elsewhere are found on the next scan; the TTL bounds
+# how stale stock levels changed by orders or other workers can be.
+inventory_lookup_cache = TTLCache(
+    maxsize=int(os.getenv('INVENTORY_LOOKUP_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('INVENTORY_LOOKUP_CACHE_TTL', '10'))
+)
+
+
+def lookup_inventory_item(barcode=None, code=None):
+    """Get an inventory item's dict by exact barcode or product code, or None
+    
+    Read-through: served from the cache when possible, otherwise loaded with a
+    single indexed equality query and cached under both of its keys.
+    """
+    cache_key = ('barcode', barcode) if barcode else ('code', code)
+    cached_item = inventory_lookup_cache.get(cache_key)
+    if cached_item is not None:
+        return cached_item
+    
+    if barcode:
+        item = Inventory.query.filter_by(barcode=barcode).first()
+    else:
+        item = Inventory.query.filter_by(product_code=code).first()
+    if not item:
+        return None
+    
+    item_data = item.to_dict()
+    inventory_lookup_cache.set(('code', item.product_code), item_data)
+    if item.barcode:
+        inventory_lookup_cache.set(('barcode', item.barcode), item_data)
+    return item_data
+
+def invalidate_inventory_lookup(item, old_barcode=None):
+    """Drop cached lookups for an item, including a barcode it just replaced"""
+    inventory_lookup_cache.delete(('code', item.product_code))
+    for barcode in {item.barcode, old_barcode}:
+        if barcode:
+            inventory_lookup_cache.delete(('barcode', barcode))
+
+def normalize_barcodes():
+    """Store blank barcodes as NULL and find barcodes shared by several items
+    
+    Run before the unique barcode index is created on a database that predates
+    it. Returns a dict of each duplicated barcode to its items' product codes.
+    """
+    table = Inventory.__table__
+    db.session.execute(
+        update(table).where(func.trim(table.c.barcode) == '').values(barcode=None, updated_at=table.c.updated_at)
+    )
+    db.session.commit()
+    
+    duplicated = db.session.query(Inventory.barcode).filter(Inventory.barcode.isnot(None)).group_by(
+        Inventory.barcode
+    ).having(func.count(Inventory.id) > 1)
+    duplicates = {}
+    for barcode, product_code in db.session.query(Inventory.barcode, Inventory.product_code).filter(
+        Inventory.barcode.in_(duplicated)
+    ).order_by(Inventory.barcode, Inventory.product_code):
+        duplicates.setdefault(barcode, []).append(product_code)
+    return duplicates
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.exc import DBAPIError
+
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.services.search_index import NgramIndex, normalize_text, prefix_condition
+
+
+# Ranked matches considered per search, before other filters and pagination
+MAX_SEARCH_RESULTS = 1000
+
+# Shortest word the trigram tokenizer can match
+MIN_TOKEN_LENGTH = 3
+
+# Rows re-read before the last seen updated_at, for writes that committed late
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+FTS_TABLE = 'inventory_fts'
+FULLTEXT_INDEX_NAME = 'ft_inventory_search'
+
+# A standalone FTS5 table keyed by item_id, since the inventory rowid is not stable across
+# VACUUM. Updates scan it for the item_id, which is fine for write-rarely product data.
+FTS5_SETUP = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "item_id UNINDEXED, search_key, product_code, barcode, tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON inventory BEGIN "
+    f"INSERT INTO {FTS_TABLE} (item_id, search_key, product_code, barcode) "
+    "VALUES (new.id, new.search_key, new.product_code, new.barcode); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF search_key, product_code, barcode ON inventory BEGIN "
+    f"UPDATE {FTS_TABLE} SET search_key = new.search_key, product_code = new.product_code, barcode = new.barcode "
+    "WHERE item_id = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON inventory BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE item_id = old.id; END"
+]
+
+
+def _fts5_query(words):
+    # Each word becomes a quoted phrase; FTS5 ANDs them
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+def _fulltext_query(words):
+    return ' '.join('+"' + word.replace('"', '') + '"' for word in words)
+
+
+class InventorySearch:
+    """Ranked inventory search over product name, code and barcode
+    
+    Runs on a SQLite FTS5 trigram table or a MySQL FULLTEXT ngram index once
+    `flask init-db` has created one; both are kept in sync by the database.
+    Otherwise an in-process n-gram index is loaded on first use and refreshed
+    from updated_at at most every refresh_interval seconds, so other workers'
+    writes and bulk imports show up. Exact product code or barcode matches
+    always rank first.
+    """
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self._backend = None
+        self._index = NgramIndex()
+        self._loaded = False
+        self._loaded_until = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """Get the search backend in use: fts5, fulltext or memory"""
+        if self._backend is None:
+            self._backend = self._detect_backend()
+        return self._backend
+
+    def _detect_backend(self):
+        dialect = db.engine.dialect.name
+        inspector = inspect(db.engine)
+        if dialect == 'sqlite' and inspector.has_table(FTS_TABLE):
+            return 'fts5'
+        if dialect == 'mysql' and any(index['name'] == FULLTEXT_INDEX_NAME for index in inspector.get_indexes('inventory')):
+            return 'fulltext'
+        return 'memory'
+
+    def ensure_index(self):
+        """Create the database search index if the database supports one
+        
+        Idempotent; returns the backend that will be used.
+        """
+        dialect = db.engine.dialect.name
+        try:
+            if dialect == 'sqlite' and not inspect(db.engine).has_table(FTS_TABLE):
+                for statement in FTS5_SETUP:
+                    db.session.execute(text(statement))
+                db.session.execute(text(
+                    f'INSERT INTO {FTS_TABLE} (item_id, search_key, product_code, barcode) '
+                    'SELECT id, search_key, product_code, barcode FROM inventory'
+                ))
+                db.session.commit()
+            elif dialect == 'mysql' and not any(
+                index['name'] == FULLTEXT_INDEX_NAME for index in inspect(db.engine).get_indexes('inventory')
+            ):
+                db.session.execute(text(
+                    f'ALTER TABLE inventory ADD FULLTEXT INDEX {FULLTEXT_INDEX_NAME} '
+                    '(search_key, product_code, barcode) WITH PARSER ngram'
+                ))
+                db.session.commit()
+        except DBAPIError as e:
+            # e.g. SQLite built without FTS5; the in-process index still works
+            db.session.rollback()
+            print(f"Inventory search index error: {e}")
+        
+        self._backend = None
+        return self.backend
+
+    def search_ids(self, query, limit=MAX_SEARCH_RESULTS):
+        """Get ids of matching inventory items, most relevant first"""
+        query = ' '.join(query.split())
+        if not query:
+            return []
+        
+        ranked = [item_id for (item_id,) in db.session.query(Inventory.id).filter(
+            or_(Inventory.product_code == query, Inventory.barcode == query)
+        ).limit(limit)]
+        
+        seen = set(ranked)
+        for item_id in self._search(query, limit):
+            if item_id not in seen:
+                seen.add(item_id)
+                ranked.append(item_id)
+        return ranked[:limit]
+
+    def record_changed(self, item):
+        """Update the in-process index after an item was created or changed"""
+        if self._loaded:
+            self._add(item.id, item.product_name, item.product_code, item.barcode)
+
+    def _search(self, query, limit):
+        # The database indexes hold normalized search keys, so queries are normalized too
+        key = normalize_text(query)
+        words = [word for word in key.split() if len(word) >= MIN_TOKEN_LENGTH]
+        backend = self.backend
+        
+        if backend != 'memory' and not words:
+            # Too short for the n-gram index; fall back to indexed prefix matches
+            return [item_id for (item_id,) in db.session.query(Inventory.id).filter(
+                or_(prefix_condition(Inventory.product_code, query), prefix_condition(Inventory.search_key, key))
+            ).order_by(Inventory.search_key).limit(limit)]
+        
+        if backend == 'fts5':
+            rows = db.session.execute(text(
+                f'SELECT item_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query ORDER BY rank LIMIT :limit'
+            ), {'query': _fts5_query(words), 'limit': limit})
+            return [row[0] for row in rows]
+        
+        if backend == 'fulltext':
+            rows = db.session.execute(text(
+                'SELECT id FROM inventory '
+                'WHERE MATCH (search_key, product_code, barcode) AGAINST (:query IN BOOLEAN MODE) '
+                'ORDER BY MATCH (search_key, product_code, barcode) AGAINST (:query IN BOOLEAN MODE) DESC LIMIT :limit'
+            ), {'query': _fulltext_query(words), 'limit': limit})
+            return [row[0] for row in rows]
+        
+        self._refresh_if_due()
+        return [item_id for item_id, _ in self._index.search(query, limit)]
+
+    def _add(self, item_id, product_name, product_code, barcode):
+        self._index.add(item_id, (product_name, product_code, barcode), keys=(product_code, barcode))
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        
+        with self._lock:
+            if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return
+            
+            # Re-adding rows already indexed is harmless
+            query = db.session.query(
+                Inventory.id, Inventory.product_name, Inventory.product_code, Inventory.barcode, Inventory.updated_at
+            )
+            if self._loaded_until is not None:
+                query = query.filter(Inventory.updated_at >= self._loaded_until - REFRESH_OVERLAP)
+            
+            for item_id, product_name, product_code, barcode, updated_at in query.yield_per(1000):
+                self._add(item_id, product_name, product_code, barcode)
+                if updated_at and (self._loaded_until is None or updated_at > self._loaded_until):
+                    self._loaded_until = updated_at
+            
+            self._loaded = True
+            self._refreshed_at = time.monotonic()
+
+
+inventory_search = InventorySearch(
+    refresh_interval=float(os.getenv('INVENTORY_SEARCH_REFRESH_INTERVAL', '5'))
+)
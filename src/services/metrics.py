@@ -0,0 +1,39 @@
+import bisect
+import threading
+
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Thread-safe histogram of observations with fixed bucket bounds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        """Get cumulative bucket counts keyed by upper bound, plus count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total, value_sum = self.count, self.sum
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+
+        return {'buckets': buckets, 'count': total, 'sum': value_sum}
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(record):
+    """Encode a record's (created_at, id) position as an opaque cursor"""
+    payload = json.dumps([record.created_at.isoformat(), record.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), record_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+def cursor_paginate(query, model, cursor, per_page):
+    """Keyset pagination on (created_at, id), newest first
+
+    Seeks past the cursor instead of using OFFSET and skips the COUNT(*), so
+    every page costs the same as the first one.
+    """
+    query = query.order_by(None).order_by(model.created_at.desc(), model.id.desc())
+
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < record_id)
+            )
+        )
+
+    items = query.limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    return items, {
+        'per_page': per_page,
+        'next_cursor': encode_cursor(items[-1]) if has_next else None,
+        'has_next': has_next
+    }
+
+def paginate_query(query, model, page, per_page, cursor=None):
+    """Paginate by page number, or by cursor when one is supplied
+
+    Pass cursor='' to request the first page in cursor mode.
+    """
+    if cursor is not None:
+        return cursor_paginate(query, model, cursor, per_page)
+
+    pagination = query.paginate(
+        page=page,
+        per_page=per_page,
+        error_out=False
+    )
+
+    return pagination.items, {
+        'page': page,
+        'pages': pagination.pages,
+        'per_page': per_page,
+        'total': pagination.total,
+        'has_next': pagination.has_next,
+        'has_prev': pagination.has_prev
+    }
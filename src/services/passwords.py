@@ -0,0 +1,110 @@
+import os
+import time
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:
+    PasswordHasher = None
+
+
+PASSWORD_HASH_ALGORITHMS = ('pbkdf2', 'scrypt', 'argon2')
+
+
+class PasswordHashPolicy:
+    """Password hashing algorithm and cost
+
+    pbkdf2 and scrypt hashes use Werkzeug's "method$salt$hash" format, whose
+    method prefix records the cost, so outdated hashes can be spotted without
+    verifying them. argon2 needs the optional argon2-cffi package.
+    """
+
+    def __init__(self, algorithm='pbkdf2', pbkdf2_iterations=600000, scrypt_n=2 ** 15, scrypt_r=8, scrypt_p=1,
+                 argon2_time_cost=3, argon2_memory_cost=65536, argon2_parallelism=4):
+        if algorithm not in PASSWORD_HASH_ALGORITHMS:
+            raise ValueError(f'Unknown password hash algorithm: {algorithm}')
+        if algorithm == 'argon2' and PasswordHasher is None:
+            raise ValueError('argon2 password hashing requires the argon2-cffi package')
+
+        self.algorithm = algorithm
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self._argon2 = PasswordHasher(
+            time_cost=argon2_time_cost,
+            memory_cost=argon2_memory_cost,
+            parallelism=argon2_parallelism
+        ) if PasswordHasher else None
+
+    @classmethod
+    def from_env(cls):
+        """Build the policy from PASSWORD_HASH_* environment variables"""
+        return cls(
+            algorithm=os.getenv('PASSWORD_HASH_ALGORITHM', 'pbkdf2'),
+            pbkdf2_iterations=int(os.getenv('PASSWORD_HASH_PBKDF2_ITERATIONS', '600000')),
+            scrypt_n=int(os.getenv('PASSWORD_HASH_SCRYPT_N', str(2 ** 15))),
+            scrypt_r=int(os.getenv('PASSWORD_HASH_SCRYPT_R', '8')),
+            scrypt_p=int(os.getenv('PASSWORD_HASH_SCRYPT_P', '1')),
+            argon2_time_cost=int(os.getenv('PASSWORD_HASH_ARGON2_TIME_COST', '3')),
+            argon2_memory_cost=int(os.getenv('PASSWORD_HASH_ARGON2_MEMORY_COST', '65536')),
+            argon2_parallelism=int(os.getenv('PASSWORD_HASH_ARGON2_PARALLELISM', '4'))
+        )
+
+    @property
+    def method(self):
+        """Get the setting as a short string, e.g. scrypt:32768:8:1"""
+        if self.algorithm == 'pbkdf2':
+            return f'pbkdf2:sha256:{self.pbkdf2_iterations}'
+        if self.algorithm == 'scrypt':
+            return f'scrypt:{self.scrypt_n}:{self.scrypt_r}:{self.scrypt_p}'
+        return f'argon2id:{self._argon2.time_cost}:{self._argon2.memory_cost}:{self._argon2.parallelism}'
+
+    def hash(self, password):
+        """Hash a password with this policy"""
+        if self.algorithm == 'argon2':
+            return self._argon2.hash(password)
+        return generate_password_hash(password, method=self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a hash made with any supported setting"""
+        if password_hash.startswith('$argon2'):
+            if self._argon2 is None:
+                return False
+            try:
+                return self._argon2.verify(password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+        return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Check whether a stored hash was made with a different algorithm or cost"""
+        if self.algorithm == 'argon2':
+            return not password_hash.startswith('$argon2') or self._argon2.check_needs_rehash(password_hash)
+        return password_hash.split('$', 1)[0] != self.method
+
+
+password_policy = PasswordHashPolicy.from_env()
+
+
+def get_benchmark_policies():
+    """Get the configured policy plus common settings to compare it against"""
+    policies = [password_policy]
+    policies += [PasswordHashPolicy('pbkdf2', pbkdf2_iterations=iterations) for iterations in (100000, 300000, 600000)]
+    policies += [PasswordHashPolicy('scrypt', scrypt_n=2 ** exponent) for exponent in (14, 15, 16)]
+    if PasswordHasher is not None:
+        policies += [PasswordHashPolicy('argon2', argon2_time_cost=time_cost) for time_cost in (2, 3)]
+    return policies
+
+def benchmark_policy(policy, duration=1.0):
+    """Measure how many hashes per second a single thread can compute with a policy"""
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0
+    while elapsed < duration:
+        policy.hash('benchmark-password')
+        count += 1
+        elapsed = time.perf_counter() - started
+    return count / elapsed
@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+
+logger = logging.getLogger('src.slow_queries')
+
+
+class QueryStats:
+    """Per-request SQL query counts and timings, with per-endpoint aggregates
+    
+    Adds X-Query-Count and X-DB-Time (milliseconds) headers to every response
+    and logs statements slower than slow_query_ms. Streamed responses only
+    count the queries run before streaming starts.
+    """
+
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_ms = slow_query_ms
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        """Hook cursor events on the app's engine and request hooks on the app"""
+        with app.app_context():
+            engine = db.engine
+        
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def stats(self):
+        """Get per-endpoint aggregates, heaviest total query count first"""
+        with self._lock:
+            endpoints = [dict(data, endpoint=endpoint) for endpoint, data in self._endpoints.items()]
+        
+        for data in endpoints:
+            data['avg_queries'] = round(data['queries'] / data['requests'], 2)
+            data['avg_db_time_ms'] = round(data['db_time_ms'] / data['requests'], 2)
+            data['db_time_ms'] = round(data['db_time_ms'], 2)
+        
+        return sorted(endpoints, key=lambda data: data['queries'], reverse=True)
+
+    def reset(self):
+        """Clear the per-endpoint aggregates"""
+        with self._lock:
+            self._endpoints.clear()
+
+    def _start_request(self):
+        g.query_count = 0
+        g.db_time = 0.0
+        g.slow_queries = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started_at'].pop()
+        
+        # Queries from background threads or CLI commands belong to no request
+        if not has_request_context() or 'query_count' not in g:
+            return
+        
+        g.query_count += 1
+        g.db_time += elapsed
+        
+        if elapsed * 1000 >= self.slow_query_ms:
+            g.slow_queries += 1
+            logger.warning('Slow query (%.1f ms) on %s: %s', elapsed * 1000, request.endpoint, statement)
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started_at'):
+            connection.info['query_started_at'].pop()
+
+    def _finish_request(self, response):
+        if 'query_count' not in g:
+            return response
+        
+        db_time_ms = g.db_time * 1000
+        response.headers['X-Query-Count'] = str(g.query_count)
+        response.headers['X-DB-Time'] = f'{db_time_ms:.2f}'
+        
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            data = self._endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_time_ms': 0.0,
+                'slow_queries': 0
+            })
+            data['requests'] += 1
+            data['queries'] += g.query_count
+            data['max_queries'] = max(data['max_queries'], g.query_count)
+            data['db_time_ms'] += db_time_ms
+            data['slow_queries'] += g.slow_queries
+        
+        return response
+
+
+query_stats = QueryStats(slow_query_ms=float(os.getenv('SLOW_QUERY_MS', '200')))
@@ -0,0 +1,69 @@
+from functools import lru_cache, wraps
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt
+
+
+ROLES = (
+    'admin', 'hr_manager', 'sales_manager', 'finance_manager', 'logistics_manager',
+    'warehouse_manager', 'sales_rep', 'employee', 'customer_support'
+)
+
+MANAGER_ROLES = tuple(role for role in ROLES if role.endswith('_manager'))
+
+# Single source of truth for who may do what
+PERMISSIONS = {
+    'admin': ('admin',),
+    'hr': ('admin', 'hr_manager'),
+    'customers': ('admin', 'sales_manager', 'sales_rep', 'customer_support'),
+    'orders': ('admin', 'sales_manager', 'sales_rep', 'logistics_manager'),
+    'my_orders': ('sales_manager', 'sales_rep'),
+    'inventory': ('admin', 'warehouse_manager', 'logistics_manager', 'sales_manager'),
+    'payroll': ('admin', 'hr_manager', 'finance_manager'),
+    'finance': ('admin', 'finance_manager'),
+    'reports': ('admin',) + MANAGER_ROLES,
+    'team': ('admin',) + MANAGER_ROLES
+}
+
+
+def compile_policy(permissions):
+    """Compile a permission table to (permission bits, role masks)"""
+    permission_bits = {name: 1 << index for index, name in enumerate(permissions)}
+    role_masks = {role: 0 for role in ROLES}
+    for name, roles in permissions.items():
+        for role in roles:
+            role_masks[role] |= permission_bits[name]
+    return permission_bits, role_masks
+
+
+PERMISSION_BITS, ROLE_MASKS = compile_policy(PERMISSIONS)
+
+
+def permission_mask(*permissions):
+    """Get the combined bit mask for permission names"""
+    mask = 0
+    for name in permissions:
+        mask |= PERMISSION_BITS[name]
+    return mask
+
+def has_permission(role, *permissions):
+    """Check whether a role holds any of the given permissions"""
+    return bool(ROLE_MASKS.get(role, 0) & permission_mask(*permissions))
+
+@lru_cache(maxsize=4096)
+def is_endpoint_allowed(endpoint, role, mask):
+    """Cached access decision for a role on an endpoint requiring any bit of mask"""
+    return bool(ROLE_MASKS.get(role, 0) & mask)
+
+def require_permission(*permissions):
+    """Decorator to require any of the given permissions from the token's role"""
+    mask = permission_mask(*permissions)
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not is_endpoint_allowed(request.endpoint, get_jwt().get('role'), mask):
+                return jsonify({'error': 'Insufficient permissions'}), 403
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,170 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, request
+
+from src.services.metrics import DEFAULT_BUCKETS, Histogram
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RequestMetrics:
+    """Request latency histograms, status counters and in-flight gauges per endpoint
+
+    Rendered in the Prometheus text format. When multiproc_dir is set, each
+    worker also writes its totals to a file there (at most every
+    dump_interval seconds) and render() merges every worker's file, so any
+    gunicorn worker can answer a scrape for the whole server. In-flight gauges
+    are only summed for workers that are still running.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, multiproc_dir=None, dump_interval=5):
+        self.buckets = tuple(buckets)
+        self.multiproc_dir = multiproc_dir
+        self.dump_interval = dump_interval
+        self._latency = {}
+        self._responses = {}
+        self._in_flight = {}
+        self._dumped_at = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Register request hooks on the app"""
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def snapshot(self):
+        """Get this process's metrics as plain data"""
+        with self._lock:
+            latency = {endpoint: histogram.snapshot() for endpoint, histogram in self._latency.items()}
+            return {
+                'pid': os.getpid(),
+                'latency': latency,
+                'responses': [[endpoint, method, status, count] for (endpoint, method, status), count in self._responses.items()],
+                'in_flight': dict(self._in_flight)
+            }
+
+    def render(self):
+        """Render metrics for this process, or all workers in multiprocess mode"""
+        snapshots = [self.snapshot()]
+        if self.multiproc_dir:
+            self._dump(snapshots[0])
+            snapshots = self._load_snapshots()
+
+        latency = {}
+        responses = {}
+        in_flight = {}
+        for snapshot in snapshots:
+            for endpoint, histogram in snapshot['latency'].items():
+                merged = latency.setdefault(endpoint, {'buckets': {}, 'count': 0, 'sum': 0.0})
+                for bound, count in histogram['buckets'].items():
+                    merged['buckets'][bound] = merged['buckets'].get(bound, 0) + count
+                merged['count'] += histogram['count']
+                merged['sum'] += histogram['sum']
+
+            for endpoint, method, status, count in snapshot['responses']:
+                key = (endpoint, method, status)
+                responses[key] = responses.get(key, 0) + count
+
+            if snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid']):
+                for endpoint, count in snapshot['in_flight'].items():
+                    in_flight[endpoint] = in_flight.get(endpoint, 0) + count
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for endpoint in sorted(latency):
+            histogram = latency[endpoint]
+            for bound in [str(bound) for bound in self.buckets] + ['+Inf']:
+                lines.append(f'http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=bound)} {histogram["buckets"].get(bound, 0)}')
+            lines.append(f'http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {histogram["sum"]}')
+            lines.append(f'http_request_duration_seconds_count{_labels(endpoint=endpoint)} {histogram["count"]}')
+
+        lines += ['# HELP http_requests_total Responses by endpoint, method and status', '# TYPE http_requests_total counter']
+        for (endpoint, method, status), count in sorted(responses.items()):
+            lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+        lines += ['# HELP http_requests_in_flight Requests currently being handled', '# TYPE http_requests_in_flight gauge']
+        for endpoint, count in sorted(in_flight.items()):
+            lines.append(f'http_requests_in_flight{_labels(endpoint=endpoint)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _start_request(self):
+        g.request_started_at = time.perf_counter()
+        g.request_endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            self._in_flight[g.request_endpoint] = self._in_flight.get(g.request_endpoint, 0) + 1
+
+    def _finish_request(self, response):
+        if 'request_started_at' not in g:
+            return response
+
+        elapsed = time.perf_counter() - g.request_started_at
+        key = (g.request_endpoint, request.method, str(response.status_code))
+        with self._lock:
+            histogram = self._latency.get(g.request_endpoint)
+            if histogram is None:
+                histogram = self._latency[g.request_endpoint] = Histogram(self.buckets)
+            self._responses[key] = self._responses.get(key, 0) + 1
+        histogram.observe(elapsed)
+
+        if self.multiproc_dir and time.monotonic() - self._dumped_at >= self.dump_interval:
+            self._dump(self.snapshot())
+
+        return response
+
+    def _teardown_request(self, exception=None):
+        if 'request_endpoint' not in g:
+            return
+        with self._lock:
+            self._in_flight[g.request_endpoint] -= 1
+
+    def _dump(self, snapshot):
+        path = os.path.join(self.multiproc_dir, f'request_metrics_{snapshot["pid"]}.json')
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'w') as metrics_file:
+                json.dump(snapshot, metrics_file)
+            os.replace(temp_path, path)
+            self._dumped_at = time.monotonic()
+        except OSError as e:
+            print(f"Metrics dump error: {e}")
+
+    def _load_snapshots(self):
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'request_metrics_*.json')):
+            try:
+                with open(path) as metrics_file:
+                    snapshots.append(json.load(metrics_file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+request_metrics = RequestMetrics(
+    multiproc_dir=os.getenv('METRICS_MULTIPROC_DIR') or os.getenv('PROMETHEUS_MULTIPROC_DIR'),
+    dump_interval=float(os.getenv('METRICS_DUMP_INTERVAL', '5'))
+)
@@ -0,0 +1,174 @@
+from decimal import Decimal
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.payroll import Order, DailySalesRollup, NO_SALES_REP
+
+
+def snapshot_order(order):
+    """Capture the rollup key and total of an order before it is modified"""
+    return {
+        'sales_date': order.order_date,
+        'status': order.status or 'pending',
+        'sales_rep_id': order.sales_rep_id or NO_SALES_REP,
+        'customer_id': order.customer_id,
+        'total': Decimal(str(order.total or 0))
+    }
+
+def _rollup_filter(snapshot):
+    return db.session.query(DailySalesRollup).filter(
+        DailySalesRollup.sales_date == snapshot['sales_date'],
+        DailySalesRollup.status == snapshot['status'],
+        DailySalesRollup.sales_rep_id == snapshot['sales_rep_id'],
+        DailySalesRollup.customer_id == snapshot['customer_id']
+    )
+
+def apply_rollup_delta(snapshot, sign, order_count=1):
+    """Add (sign=1) or remove (sign=-1) orders from their rollup bucket
+    
+    snapshot['total'] is the combined total of the order_count orders. Runs in
+    the caller's transaction so the rollup commits together with the order
+    change.
+    """
+    values = {
+        DailySalesRollup.order_count: DailySalesRollup.order_count + sign * order_count,
+        DailySalesRollup.total_sales: DailySalesRollup.total_sales + sign * snapshot['total']
+    }
+    
+    if _rollup_filter(snapshot).update(values, synchronize_session=False):
+        return
+    
+    if sign < 0:
+        # Nothing to remove from; the bucket predates the rollup and needs a rebuild
+        return
+    
+    try:
+        with db.session.begin_nested():
+            db.session.add(DailySalesRollup(
+                sales_date=snapshot['sales_date'],
+                status=snapshot['status'],
+                sales_rep_id=snapshot['sales_rep_id'],
+                customer_id=snapshot['customer_id'],
+                order_count=order_count,
+                total_sales=snapshot['total']
+            ))
+    except IntegrityError:
+        # Another transaction created the bucket first
+        _rollup_filter(snapshot).update(values, synchronize_session=False)
+
+def record_order_created(order):
+    """Add a newly created order to the rollup"""
+    apply_rollup_delta(snapshot_order(order), 1)
+
+def record_orders_created(orders):
+    """Add many new orders to the rollup with one update per bucket"""
+    buckets = {}
+    for order in orders:
+        snapshot = snapshot_order(order)
+        key = (snapshot['sales_date'], snapshot['status'], snapshot['sales_rep_id'], snapshot['customer_id'])
+        if key in buckets:
+            buckets[key][0]['total'] += snapshot['total']
+            buckets[key][1] += 1
+        else:
+            buckets[key] = [snapshot, 1]
+    
+    for snapshot, order_count in buckets.values():
+        apply_rollup_delta(snapshot, 1, order_count)
+
+def record_order_changed(before, order):
+    """Move an order between rollup buckets after it has been modified"""
+    after = snapshot_order(order)
+    if before == after:
+        return
+    
+    apply_rollup_delta(before, -1)
+    apply_rollup_delta(after, 1)
+
+def rebuild_sales_rollup(start_date=None, end_date=None):
+    """Recompute rollup rows from the orders table, optionally for a date range
+    
+    Returns the number of rollup rows written.
+    """
+    delete_query = db.session.query(DailySalesRollup)
+    source = select(
+        Order.order_date,
+        func.coalesce(Order.status, 'pending'),
+        func.coalesce(Order.sales_rep_id, NO_SALES_REP),
+        Order.customer_id,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total), 0)
+    ).where(Order.order_date.isnot(None))
+    
+    if start_date:
+        delete_query = delete_query.filter(DailySalesRollup.sales_date >= start_date)
+        source = source.where(Order.order_date >= start_date)
+    
+    if end_date:
+        delete_query = delete_query.filter(DailySalesRollup.sales_date <= end_date)
+        source = source.where(Order.order_date <= end_date)
+    
+    source = source.group_by(
+        Order.order_date,
+        func.coalesce(Order.status, 'pending'),
+        func.coalesce(Order.sales_rep_id, NO_SALES_REP),
+        Order.customer_id
+    )
+    
+    delete_query.delete(synchronize_session=False)
+    result = db.session.execute(
+        insert(DailySalesRollup).from_select(
+            ['sales_date', 'status', 'sales_rep_id', 'customer_id', 'order_count', 'total_sales'],
+            source
+        )
+    )
+    db.session.commit()
+    
+    return result.rowcount
+
+def ensure_sales_rollup():
+    """Build the rollup when it is empty but orders exist, e.g. on a database that predates it
+    
+    A rollup table from before its key columns were NOT NULL is recreated,
+    since rows without a sales rep could be duplicated there. Returns the
+    number of rollup rows written, or None when nothing was needed.
+    """
+    table = DailySalesRollup.__table__
+    columns = {column['name']: column for column in inspect(db.engine).get_columns(table.name)}
+    if columns['sales_rep_id']['nullable']:
+        table.drop(db.engine)
+        table.create(db.engine)
+    elif db.session.query(DailySalesRollup.id).first() is not None:
+        return None
+    if db.session.query(Order.id).first() is None:
+        return None
+    return rebuild_sales_rollup()
+
+def rollup_query(*columns, start_date=None, end_date=None, statuses=None, sales_rep_id=None):
+    """Build an aggregate query over the rollup table with the usual report filters"""
+    # Buckets emptied by status changes are kept but never reported
+    query = db.session.query(*columns).filter(DailySalesRollup.order_count > 0)
+    
+    if start_date:
+        query = query.filter(DailySalesRollup.sales_date >= start_date)
+    
+    if end_date:
+        query = query.filter(DailySalesRollup.sales_date <= end_date)
+    
+    if statuses:
+        query = query.filter(DailySalesRollup.status.in_(statuses))
+    
+    if sales_rep_id:
+        query = query.filter(DailySalesRollup.sales_rep_id == sales_rep_id)
+    
+    return query
+
+def get_sales_totals(**filters):
+    """Get (order_count, total_sales) from the rollup for the given filters"""
+    order_count, total_sales = rollup_query(
+        func.coalesce(func.sum(DailySalesRollup.order_count), 0),
+        func.coalesce(func.sum(DailySalesRollup.total_sales), 0),
+        **filters
+    ).one()
+    return int(order_count), total_sales
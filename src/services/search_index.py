@@ -0,0 +1,175 @@
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy import event
+
+
+# Longest stored search key, matching the widest name column
+SEARCH_KEY_LENGTH = 255
+
+# Arabic folding: drop diacritics (tashkeel, superscript alef) and tatweel, fold
+# alef, yaa, taa marbuta, hamza-seat and Persian letter variants, and map
+# Arabic-Indic and Persian digits to Latin ones
+ARABIC_FOLDING = str.maketrans(
+    {
+        **{chr(code): None for code in range(0x064B, 0x0660)},
+        '\u0670': None, '\u0640': None,
+        '\u0623': '\u0627', '\u0625': '\u0627', '\u0622': '\u0627', '\u0671': '\u0627',
+        '\u0649': '\u064A', '\u06CC': '\u064A', '\u0626': '\u064A',
+        '\u0624': '\u0648', '\u0629': '\u0647', '\u06A9': '\u0643',
+        **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+        **{chr(0x06F0 + digit): str(digit) for digit in range(10)}
+    }
+)
+
+
+def normalize_text(text):
+    """Lowercase, fold Arabic letter variants and digits, and collapse whitespace
+    
+    Used both for stored search keys and for queries, so a user typing without
+    diacritics or with a different alef or yaa still matches.
+    """
+    return ' '.join(str(text).lower().translate(ARABIC_FOLDING).split()) if text else ''
+
+def search_key_default(source_column):
+    """Column default computing a search key from another column of the inserted row
+    
+    Covers Core inserts such as bulk imports; ORM writes use track_search_key.
+    """
+    def default(context):
+        return normalize_text(context.get_current_parameters().get(source_column))[:SEARCH_KEY_LENGTH] or None
+    return default
+
+def track_search_key(model, source_attribute):
+    """Keep model.search_key in sync with source_attribute on ORM inserts and updates"""
+    def update_search_key(mapper, connection, target):
+        target.search_key = normalize_text(getattr(target, source_attribute))[:SEARCH_KEY_LENGTH] or None
+    
+    event.listen(model, 'before_insert', update_search_key)
+    event.listen(model, 'before_update', update_search_key)
+
+def prefix_condition(column, prefix):
+    """Filter a column by prefix with a range, so its index is used on every backend
+    
+    LIKE 'prefix%' only uses an index on SQLite for case-insensitive columns.
+    """
+    return column.between(prefix, prefix + '\uffff')
+
+def ngrams(text, n=3):
+    """Get the set of n-character substrings of each word in a normalized text"""
+    grams = set()
+    for word in text.split():
+        if len(word) <= n:
+            grams.add(word)
+        else:
+            grams.update(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+class NgramIndex:
+    """In-process inverted index from character n-grams to document ids
+    
+    Each document has searchable texts, matched by n-gram overlap so partial
+    words and small typos still hit, exact keys such as codes, which rank
+    above any text match, and optional data returned by get(). Thread-safe;
+    add() replaces a document.
+    """
+
+    def __init__(self, n=3, min_score=0.6):
+        self.n = n
+        self.min_score = min_score
+        self._documents = {}
+        self._postings = defaultdict(set)
+        self._keys = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, doc_id, texts, keys=(), data=None):
+        """Index a document's texts and exact keys, replacing any previous version"""
+        texts = tuple(normalize_text(text) for text in texts if text)
+        keys = tuple(normalize_text(key) for key in keys if key)
+        grams = set()
+        for text in texts:
+            grams |= ngrams(text, self.n)
+        
+        with self._lock:
+            self._remove(doc_id)
+            self._documents[doc_id] = (texts, keys, grams, data)
+            for gram in grams:
+                self._postings[gram].add(doc_id)
+            for key in keys:
+                self._keys[key].add(doc_id)
+
+    def get(self, doc_id):
+        """Get the data stored with a document, or None"""
+        document = self._documents.get(doc_id)
+        return document[3] if document else None
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._postings.clear()
+            self._keys.clear()
+
+    def _remove(self, doc_id):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        
+        texts, keys, grams, _ = document
+        for gram in grams:
+            postings = self._postings[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[gram]
+        for key in keys:
+            self._keys[key].discard(doc_id)
+            if not self._keys[key]:
+                del self._keys[key]
+
+    def search(self, query, limit=100):
+        """Get up to limit (doc_id, score) pairs, best first
+        
+        Exact key matches score highest, then texts containing the whole query,
+        then texts starting with it, then by the share of query n-grams found.
+        """
+        query = normalize_text(query)
+        if not query:
+            return []
+        
+        query_grams = ngrams(query, self.n)
+        with self._lock:
+            scores = {doc_id: 10.0 for doc_id in self._keys.get(query, ())}
+            
+            if len(query) < self.n:
+                # Too short for n-grams; match word prefixes directly
+                candidates = (
+                    doc_id for doc_id, (texts, _, _, _) in self._documents.items()
+                    if any(word.startswith(query) for text in texts for word in text.split())
+                )
+                matches = {doc_id: 1.0 for doc_id in candidates}
+            else:
+                counts = Counter()
+                for gram in query_grams:
+                    counts.update(self._postings.get(gram, ()))
+                matches = {
+                    doc_id: count / len(query_grams) for doc_id, count in counts.items()
+                    if count / len(query_grams) >= self.min_score
+                }
+            
+            for doc_id, score in matches.items():
+                texts = self._documents[doc_id][0]
+                if any(query in text for text in texts):
+                    score += 2.0
+                if any(text.startswith(query) for text in texts):
+                    score += 1.0
+                scores[doc_id] = scores.get(doc_id, 0) + score
+        
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], str(pair[0])))
+        return ranked[:limit]
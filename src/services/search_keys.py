@@ -0,0 +1,71 @@
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from src.models.user import db, Department, Employee, Customer
+from src.models.inventory import Inventory
+from src.services.search_index import SEARCH_KEY_LENGTH, normalize_text
+
+
+# Models with a normalized search_key column, and the attribute it is computed from
+SEARCH_KEY_SOURCES = (
+    (Inventory, 'product_name'),
+    (Customer, 'name'),
+    (Employee, 'full_name'),
+    (Department, 'name')
+)
+
+
+def ensure_search_key_columns():
+    """Add the search_key column and its index to tables created before it existed
+    
+    create_all only creates missing tables, so older databases need this once.
+    Returns the names of the tables that were altered.
+    """
+    altered = []
+    inspector = inspect(db.engine)
+    for model, _ in SEARCH_KEY_SOURCES:
+        table = model.__table__
+        if any(column['name'] == 'search_key' for column in inspector.get_columns(table.name)):
+            continue
+        
+        column_type = table.c.search_key.type.compile(dialect=db.engine.dialect)
+        db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN search_key {column_type}'))
+        db.session.commit()
+        for index in table.indexes:
+            if 'search_key' in index.columns:
+                index.create(db.engine)
+        altered.append(table.name)
+    return altered
+
+def backfill_search_keys(rebuild=False, chunk_size=1000):
+    """Compute search keys for rows that have none, or for every row when rebuild is set
+    
+    Rows are walked by primary key in chunks, each written with one batched
+    UPDATE. Returns the number of rows updated per table.
+    """
+    counts = {}
+    for model, source in SEARCH_KEY_SOURCES:
+        table = model.__table__
+        # Keep updated_at as is; a derived column changing is not a record change
+        statement = update(table).where(table.c.id == bindparam('row_id')).values(
+            search_key=bindparam('key'), updated_at=table.c.updated_at
+        )
+        counts[table.name] = 0
+        last_id = None
+        while True:
+            query = select(table.c.id, table.c[source]).order_by(table.c.id).limit(chunk_size)
+            if not rebuild:
+                query = query.where(table.c.search_key.is_(None))
+            if last_id is not None:
+                query = query.where(table.c.id > last_id)
+            rows = db.session.execute(query).all()
+            if not rows:
+                break
+            
+            db.session.execute(statement, [
+                {'row_id': row_id, 'key': normalize_text(value)[:SEARCH_KEY_LENGTH] or None}
+                for row_id, value in rows
+            ])
+            db.session.commit()
+            counts[table.name] += len(rows)
+            last_id = rows[-1][0]
+    return counts
@@ -0,0 +1,39 @@
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from src.models.user import db
+from src.models.payroll import Order, OrderItem
+
+
+def order_eager_options():
+    """Loader options that fetch an order's customer and sales rep in the same query"""
+    return (
+        joinedload(Order.customer),
+        joinedload(Order.sales_rep)
+    )
+
+def get_order_items_counts(order_ids):
+    """Get item counts for many orders with a single grouped query"""
+    if not order_ids:
+        return {}
+    
+    rows = db.session.query(
+        OrderItem.order_id,
+        func.count(OrderItem.id)
+    ).filter(
+        OrderItem.order_id.in_(order_ids)
+    ).group_by(OrderItem.order_id).all()
+    
+    return {order_id: count for order_id, count in rows}
+
+def serialize_orders(orders):
+    """Serialize a list of orders using bulk-loaded item counts
+
+    Orders should be loaded with order_eager_options() so that customer and
+    sales rep names do not trigger a lazy load per row.
+    """
+    items_counts = get_order_items_counts([order.id for order in orders])
+    return [
+        order.to_dict(items_count=items_counts.get(order.id, 0))
+        for order in orders
+    ]
@@ -0,0 +1,176 @@
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.models.user import db
+from src.models.payroll import Order
+from src.models.inventory import Inventory, StockReservation
+from src.services.audit import build_audit_event, log_audit_events
+from src.services.sales_rollup import snapshot_order, record_order_changed
+
+
+# How long a pending order holds its stock before the reservation expires
+RESERVATION_TTL = timedelta(minutes=int(os.getenv('STOCK_RESERVATION_TTL_MINUTES', '30')))
+
+# Reservations whose stock is still taken from inventory
+ACTIVE_STATUSES = ('held', 'confirmed')
+
+
+class InsufficientStockError(Exception):
+    """Raised when a conditional stock decrement matches no row"""
+
+    def __init__(self, product_id, requested):
+        super().__init__(f'Insufficient stock for product {product_id}. Requested: {requested}')
+        self.product_id = product_id
+        self.requested = requested
+
+
+def take_stock(product_id, quantity):
+    """Atomically decrement stock if enough is available
+    
+    Issues UPDATE ... SET quantity_in_stock = quantity_in_stock - :n
+    WHERE quantity_in_stock >= :n, so concurrent orders never oversell and only
+    hold the row lock for the duration of the statement. Returns True if the
+    stock was taken.
+    """
+    return db.session.query(Inventory).filter(
+        Inventory.id == product_id,
+        Inventory.quantity_in_stock >= quantity
+    ).update({
+        Inventory.quantity_in_stock: Inventory.quantity_in_stock - quantity,
+        Inventory.updated_at: datetime.utcnow()
+    }, synchronize_session=False) == 1
+
+def return_stock(product_id, quantity):
+    """Atomically add stock back to a product"""
+    db.session.query(Inventory).filter(Inventory.id == product_id).update({
+        Inventory.quantity_in_stock: Inventory.quantity_in_stock + quantity,
+        Inventory.updated_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+def get_stock_demand(items):
+    """Sum requested quantities per product for (product_id, quantity) pairs"""
+    demand = {}
+    for product_id, quantity in items:
+        demand[product_id] = demand.get(product_id, 0) + Decimal(str(quantity))
+    return demand
+
+def take_stock_for_demand(demand):
+    """Take stock for every product in a demand map, or raise InsufficientStockError
+    
+    Products are decremented in id order so concurrent orders touching the same
+    products cannot deadlock. Stock already taken is returned by the caller's
+    rollback.
+    """
+    for product_id in sorted(demand):
+        if not take_stock(product_id, demand[product_id]):
+            raise InsufficientStockError(product_id, demand[product_id])
+
+def reserve_order_stock(order, items, now=None):
+    """Take stock for an order's items and record held reservations
+    
+    Runs in the caller's transaction; on InsufficientStockError the caller must
+    roll back.
+    """
+    now = now or datetime.utcnow()
+    demand = get_stock_demand((item.product_id, item.quantity) for item in items)
+    take_stock_for_demand(demand)
+    
+    reservations = [
+        StockReservation(
+            product_id=product_id,
+            order_id=order.id,
+            quantity=quantity,
+            status='held',
+            expires_at=now + RESERVATION_TTL,
+            created_at=now,
+            updated_at=now
+        ) for product_id, quantity in demand.items()
+    ]
+    db.session.add_all(reservations)
+    
+    return reservations
+
+def confirm_order_reservations(order_id):
+    """Keep an order's held stock once the order is confirmed"""
+    return db.session.query(StockReservation).filter(
+        StockReservation.order_id == order_id,
+        StockReservation.status == 'held'
+    ).update({
+        StockReservation.status: 'confirmed',
+        StockReservation.expires_at: None,
+        StockReservation.updated_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+def release_order_reservations(order_id, status='released'):
+    """Return an order's reserved stock to inventory
+    
+    Each reservation is claimed with a conditional status UPDATE before its
+    stock is returned, so a cancel racing the expiry job cannot return the
+    same stock twice. Returns the number of reservations released.
+    """
+    reservations = db.session.query(StockReservation.id, StockReservation.product_id, StockReservation.quantity).filter(
+        StockReservation.order_id == order_id,
+        StockReservation.status.in_(ACTIVE_STATUSES)
+    ).all()
+    
+    released = 0
+    now = datetime.utcnow()
+    for reservation_id, product_id, quantity in reservations:
+        claimed = db.session.query(StockReservation).filter(
+            StockReservation.id == reservation_id,
+            StockReservation.status.in_(ACTIVE_STATUSES)
+        ).update({
+            StockReservation.status: status,
+            StockReservation.updated_at: now
+        }, synchronize_session=False)
+        
+        if claimed:
+            return_stock(product_id, quantity)
+            released += 1
+    
+    return released
+
+def expire_stale_reservations(now=None):
+    """Cancel pending orders whose reservations expired and return their stock
+    
+    Returns the number of orders cancelled.
+    """
+    now = now or datetime.utcnow()
+    order_ids = [
+        order_id for (order_id,) in
+        db.session.query(StockReservation.order_id).filter(
+            StockReservation.status == 'held',
+            StockReservation.expires_at < now
+        ).distinct()
+    ]
+    
+    expired = 0
+    audit_events = []
+    for order_id in order_ids:
+        if not release_order_reservations(order_id, status='expired'):
+            continue
+        
+        order = Order.query.get(order_id)
+        if order and order.status == 'pending':
+            rollup_before = snapshot_order(order)
+            order.status = 'cancelled'
+            order.internal_notes = f"{order.internal_notes or ''}\nCancelled: stock reservation expired".strip()
+            order.updated_at = now
+            record_order_changed(rollup_before, order)
+            
+            audit_events.append(build_audit_event(
+                table_name='orders',
+                record_id=order.id,
+                operation='CANCEL',
+                new_values={'status': order.status},
+                description='Order cancelled: stock reservation expired',
+                severity='warning'
+            ))
+        
+        expired += 1
+    
+    db.session.commit()
+    log_audit_events(audit_events)
+    
+    return expired
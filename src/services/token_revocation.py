@@ -0,0 +1,154 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db, RevokedToken
+from src.services.cache import TTLCache
+
+
+# Rows re-read below the last seen id on each refresh
+REFRESH_OVERLAP = 100
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings
+    
+    Answers "definitely absent" or "possibly present"; items cannot be removed,
+    so the filter is rebuilt when expired entries are pruned.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationStore:
+    """Revoked JWT ids kept in the revoked_tokens table, fronted by a bloom filter
+    
+    A token whose jti is not in the bloom filter is not revoked, so the common
+    case costs no I/O. Bloom hits are confirmed against the table and the answer
+    is cached. Revocations from other workers are picked up at most every
+    refresh_interval seconds by loading only rows newer than the last one seen.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01, refresh_interval=5, lookup_cache_size=10000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.lookups = TTLCache(maxsize=lookup_cache_size, ttl=300)
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        """Check whether a token id has been revoked"""
+        self._refresh_if_due()
+        
+        if jti not in self._bloom:
+            return False
+        
+        revoked = self.lookups.get(jti)
+        if revoked is None:
+            revoked = db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+            self.lookups.set(jti, revoked)
+        return revoked
+
+    def revoke(self, jwt_payload):
+        """Revoke a decoded token until it would have expired anyway"""
+        jti = jwt_payload['jti']
+        try:
+            db.session.add(RevokedToken(
+                jti=jti,
+                token_type=jwt_payload.get('type', 'access'),
+                user_id=jwt_payload.get('sub'),
+                expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Already revoked
+            db.session.rollback()
+        
+        with self._lock:
+            self._bloom.add(jti)
+        self.lookups.set(jti, True)
+
+    def prune_expired(self):
+        """Delete revocations for tokens that have expired and rebuild the filter
+        
+        Returns the number of rows deleted.
+        """
+        deleted = RevokedToken.query.filter(
+            RevokedToken.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        
+        self.rebuild()
+        return deleted
+
+    def rebuild(self):
+        """Reload the bloom filter from every unexpired revocation"""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._last_id = 0
+            self._load_new_rows()
+        self.lookups.clear()
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        
+        with self._lock:
+            if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return
+            self._load_new_rows()
+        
+        # A saturated filter answers "possibly revoked" too often; grow it
+        if self._bloom.count > self.capacity:
+            self.capacity *= 2
+            self.rebuild()
+
+    def _load_new_rows(self):
+        # Re-read a few ids before the watermark in case they committed out of order
+        rows = db.session.query(RevokedToken.id, RevokedToken.jti).filter(
+            RevokedToken.id > self._last_id - REFRESH_OVERLAP,
+            RevokedToken.expires_at >= datetime.utcnow()
+        ).order_by(RevokedToken.id).all()
+        
+        for row_id, jti in rows:
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+            # Drop any "not revoked" answer cached for a bloom false positive
+            self.lookups.delete(jti)
+            self._last_id = max(self._last_id, row_id)
+        self._refreshed_at = time.monotonic()
+
+
+token_revocation = TokenRevocationStore(
+    capacity=int(os.getenv('TOKEN_REVOCATION_CAPACITY', '100000')),
+    refresh_interval=float(os.getenv('TOKEN_REVOCATION_REFRESH_INTERVAL', '5'))
+)